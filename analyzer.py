@@ -0,0 +1,334 @@
+# ======================================================================================================================
+#
+# Level analyzer, checks that a level's finish flag can be reached and which of its coins can be collected.
+#
+# Searches every way the player can move through the level, breadth first, using the batched simulation so the
+# movement, jumps, gliding and collisions are exactly the game's. The player's input is chosen every ticksPerAction
+# ticks from the actions below: standing, walking left or right, each either without jumping, holding jump to glide,
+# or pressing jump or shift-jump. States that end up in the same place are merged, which keeps the search to a few
+# hundred thousand states on a full level:
+#     - Positions are merged within positionStep pixels and fall speeds within speedStep
+#     - Where moving blocks and spike balls are is only told apart when the player is close to one, so the player can
+#       wait for a platform but an empty area isn't searched again for every tick of their movement
+#     - Health isn't part of a state, only the best health (then the shortest damage cooldown) each state is reached
+#       with is kept
+#     - As in the game, the player can take damage as long as they have health left. With allowDamage off (--no-damage)
+#       only paths where the player is never hit are searched
+# Coins the player can't get to at all, eg. coins set into the ground, are found before searching. The search stops as
+# soon as the finish and every other coin have been reached. Each search layer is split between a pool of worker
+# processes.
+#
+# The shortest path found is replayed through engine.Simulation to confirm it finishes the level, and is reported as
+# the list of input flags for each tick, which can be fed straight back into Simulation.run().
+#
+# Run from the game folder:
+#     python -m analyzer [--no-damage] [--processes count] [level files]
+#
+# With no files given, the preloaded levels and the custom level (if there is one) are checked. --allow-damage is the
+# default, --no-damage only searches paths where the player is never hit. --processes sets the number of worker
+# processes, one per CPU by default. Requires NumPy.
+#
+# ======================================================================================================================
+
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import engine
+import levelfile
+from batch import BatchSimulation, playerWidth, playerHeight
+from engine import tileSize, LEFT, RIGHT, JUMP, SHORT_JUMP, JUMP_PRESSED, PLAYING, WON
+
+# Inputs the player can choose from, each held for ticksPerAction ticks. The PRESSED flag is only set on the first tick.
+# Jumps come last, they are only tried when the player is on a block
+actions = [move | jump for jump in (0, JUMP, JUMP | JUMP_PRESSED, JUMP | JUMP_PRESSED | SHORT_JUMP)
+           for move in (0, LEFT, RIGHT)]
+airActions = 6
+ticksPerAction = 4
+# Merging of similar states. positionStep has to stay under the distance walked in one action (20 pixels), or walking
+# can end in the cell it started in and the search stalls
+positionStep = 15
+speedStep = 8
+phaseStep = 12
+# Distance from a moving object's path within which where it is matters
+moverRange = 2 * tileSize
+# Players this far below the bottom of the level are falling forever
+fallLimit = 4 * tileSize
+# Grid the positions the player fits in are checked on, in pixels, when looking for enclosed coins
+fillStep = 5
+# Least number of states given to a worker process at once
+chunkSize = 2048
+
+
+# Results of analysing a level
+class Analysis:
+    def __init__(self):
+        self.solvable = False
+        # Input flags for each tick of the shortest path found to the finish, and the ticks it takes
+        self.path = []
+        self.pathTicks = 0
+        # (column, row) tiles of the coins that can and can't be collected
+        self.reachableCoins = []
+        self.unreachableCoins = []
+        self.states = 0
+        self.seconds = 0
+
+    def __str__(self):
+        lines = [f'Finish reachable: {"yes" if self.solvable else "NO"}']
+        if self.solvable:
+            lines.append(f'Shortest path found: {self.pathTicks} ticks ({self.pathTicks / engine.FPS:.1f} s)')
+        coins = len(self.reachableCoins) + len(self.unreachableCoins)
+        lines.append(f'Coins reachable: {len(self.reachableCoins)} / {coins}')
+        if self.unreachableCoins:
+            lines.append('Unreachable coins (column, row): ' + ', '.join(map(str, self.unreachableCoins)))
+        lines.append(f'States searched: {self.states:,} in {self.seconds:.1f} s')
+        return '\n'.join(lines)
+
+
+# Search expansion, holds the level the search runs in. Each worker process has its own
+class Expander:
+    def __init__(self, data, allowDamage):
+        self.allowDamage = allowDamage
+        self.template = BatchSimulation(data, 0)
+        self.levelHeight = len(data) * tileSize
+        # Areas around the paths of the moving blocks and spike balls
+        template = self.template
+        blockSpan = tileSize + 1
+        self.blockZones = [(x - blockSpan * (axis == 0), y - blockSpan * (axis == 1),
+                            tileSize + 2 * blockSpan * (axis == 0), tileSize // 2 + 2 * blockSpan * (axis == 1))
+                           for x, y, axis in zip(template.blockX, template.blockY, template.blockAxis)]
+        self.ballZones = [(x - 50, y, tileSize + 100, tileSize) for x, y in zip(template.ballX, template.ballY)]
+
+    # Players overlapping any of the zones, padded by moverRange
+    def near(self, x, y, zones):
+        found = np.zeros(len(x), dtype=bool)
+        for zoneX, zoneY, zoneWidth, zoneHeight in zones:
+            found |= ((x < zoneX + zoneWidth + moverRange) & (x + 45 > zoneX - moverRange)
+                      & (y < zoneY + zoneHeight + moverRange) & (y + 80 > zoneY - moverRange))
+        return found
+
+    # Key identifying similar states, states with the same key are merged
+    def keys(self, batch):
+        # Near a moving block, where the blocks are is part of the key, otherwise near a spike ball where the balls are
+        phase = np.where(self.near(batch.x, batch.y, self.ballZones),
+                         batch.ticks % BatchSimulation.ballPeriod // phaseStep + 1, 0)
+        phase = np.where(self.near(batch.x, batch.y, self.blockZones),
+                         batch.ticks % BatchSimulation.blockPeriod // phaseStep + 100, phase)
+        key = (batch.x + 10000) // positionStep
+        key = key * 10000 + (batch.y + 10000) // positionStep
+        key = key * 100 + (batch.yVel + 50) // speedStep
+        key = key * 2 + batch.onBlock
+        return key * 100000 + phase
+
+    # Runs every action from every state given, returns the states the actions lead to that are still playing, which
+    # state and action each came from, their keys, the coins collected and the (state, action) pairs that won
+    def expand(self, states):
+        x, y, yVel, onBlock, health, damageCD, ticks = states
+        # One player for each state and action tried from it
+        tried = np.where(onBlock, len(actions), airActions)
+        stateIndexes = np.repeat(np.arange(len(x)), tried)
+        actionIndexes = np.arange(len(stateIndexes)) - np.repeat(np.cumsum(tried) - tried, tried)
+        count = len(stateIndexes)
+        batch = self.template
+        batch.count = count
+        batch.x = x[stateIndexes]
+        batch.y = y[stateIndexes]
+        batch.yVel = yVel[stateIndexes]
+        batch.onBlock = onBlock[stateIndexes].astype(bool)
+        batch.health = health[stateIndexes]
+        batch.damageCD = damageCD[stateIndexes]
+        batch.ticks = ticks[stateIndexes]
+        batch.score = np.zeros(count, dtype=np.int64)
+        batch.status = np.full(count, PLAYING, dtype=np.int64)
+        batch.coinsLeft = np.ones((count, len(batch.coinX)), dtype=bool)
+        inputs = np.array(actions, dtype=np.int64)[actionIndexes]
+        for tick in range(ticksPerAction):
+            batch.step(inputs if tick == 0 else inputs & ~JUMP_PRESSED)
+        # The player keeps playing while they have health left, or only while unhurt if damage isn't allowed
+        unhurt = batch.health > 0 if self.allowDamage else batch.health == 5
+        won = unhurt & (batch.status == WON)
+        alive = unhurt & (batch.status == PLAYING) & (batch.y < self.levelHeight + fallLimit)
+        collected = ~batch.coinsLeft[alive | won].all(axis=0)
+        won = np.nonzero(won)[0]
+        survivors = np.nonzero(alive)[0]
+        keys, first = bestOfEach(self.keys(batch)[survivors], batch.health[survivors], batch.damageCD[survivors])
+        survivors = survivors[first]
+        children = tuple(array[survivors] for array in (batch.x, batch.y, batch.yVel, batch.onBlock, batch.health,
+                                                         batch.damageCD, batch.ticks))
+        return (children, stateIndexes[survivors], actionIndexes[survivors], keys, collected,
+                (stateIndexes[won], actionIndexes[won]))
+
+
+# Index of the best state for each distinct key: the one with the most health, then the shortest damage cooldown.
+# Returns the keys in order and the indexes
+def bestOfEach(keys, health, damageCD):
+    order = np.lexsort((damageCD, -health, keys))
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    return keys[first], order[first]
+
+
+# Rank of a state's health and damage cooldown, higher is better
+def healthRank(health, damageCD):
+    return health * 1000 - damageCD
+
+
+# Coins the player can't get to from the spawn point without passing through stationary blocks, eg. coins set into the
+# ground. Worked out from every position on a grid of fillStep pixels the player fits in without overlapping a block,
+# flood filled from the spawn point. Gravity and the moving objects are left out, so every coin the search can reach is
+# outside of what this finds. Returns True for each coin that is enclosed
+def enclosedCoins(template):
+    solid = template.solid
+    rows, columns = solid.shape
+    # Number of solid tiles above and to the left of each tile corner
+    sums = np.zeros((rows + 1, columns + 1), dtype=np.int64)
+    sums[1:, 1:] = solid.cumsum(0).cumsum(1)
+    x = np.arange(0, columns * tileSize - playerWidth + 1, fillStep)[None, :]
+    y = np.arange(-playerHeight, rows * tileSize - playerHeight + 1, fillStep)[:, None]
+    firstColumn = np.clip(x // tileSize, 0, columns)
+    lastColumn = np.clip((x + playerWidth - 1) // tileSize + 1, 0, columns)
+    firstRow = np.clip(y // tileSize, 0, rows)
+    lastRow = np.clip((y + playerHeight - 1) // tileSize + 1, 0, rows)
+    free = (sums[lastRow, lastColumn] - sums[firstRow, lastColumn] - sums[lastRow, firstColumn]
+            + sums[firstRow, firstColumn]) == 0
+    # Grows the area reached from the spawn point a step at a time, until it stops growing
+    reached = np.zeros_like(free)
+    reached[(engine.spawnY + playerHeight) // fillStep, engine.spawnX // fillStep] = True
+    while True:
+        grown = reached.copy()
+        grown[1:] |= reached[:-1]
+        grown[:-1] |= reached[1:]
+        grown[:, 1:] |= reached[:, :-1]
+        grown[:, :-1] |= reached[:, 1:]
+        grown &= free
+        if (grown == reached).all():
+            break
+        reached = grown
+    enclosed = np.zeros(len(template.coinX), dtype=bool)
+    for coin, (coinX, coinY) in enumerate(zip(template.coinX.tolist(), template.coinY.tolist())):
+        touching = ((x > coinX - playerWidth) & (x < coinX + tileSize)) & ((y > coinY - playerHeight)
+                                                                            & (y < coinY + tileSize))
+        enclosed[coin] = not (reached & touching).any()
+    return enclosed
+
+
+# Expander of the current worker process
+workerExpander = None
+
+
+def startWorker(data, allowDamage):
+    global workerExpander
+    workerExpander = Expander(data, allowDamage)
+
+
+def expandInWorker(states):
+    return workerExpander.expand(states)
+
+
+# Searches a level for the finish and its coins, processes is the number of worker processes, by default one per CPU.
+# With allowDamage off, paths where the player is hit are dropped
+def analyze(data, processes=None, allowDamage=True):
+    start = time.perf_counter()
+    analysis = Analysis()
+    processes = processes or os.cpu_count() or 1
+    expander = Expander(data, allowDamage)
+    pool = multiprocessing.Pool(processes, startWorker, (data, allowDamage)) if processes > 1 else None
+    # Every state kept, as the state it came from and the action taken
+    parents = [-1]
+    parentActions = [-1]
+    # Best health rank each key has been reached with
+    seen = {}
+    frontier = tuple(np.array([value], dtype=np.int64) for value in (engine.spawnX, engine.spawnY, 0, 0, 5, 0, 0))
+    frontierIds = np.array([0])
+    collected = np.zeros(len(expander.template.coinX), dtype=bool)
+    # Coins set into the ground can't be collected, so aren't searched for
+    reachable = ~enclosedCoins(expander.template)
+    winner = None
+    try:
+        # Searches until every state has been seen, or the finish and every coin that isn't enclosed have been found
+        while len(frontierIds) and (winner is None or not collected[reachable].all()):
+            # Splits the layer between the workers
+            chunks = max(min(processes * 4, len(frontierIds) // chunkSize), 1)
+            bounds = np.linspace(0, len(frontierIds), chunks + 1).astype(int)
+            parts = [tuple(array[first:last] for array in frontier) for first, last in zip(bounds, bounds[1:])]
+            results = pool.map(expandInWorker, parts) if pool is not None else map(expander.expand, parts)
+            layer = []
+            for (children, parentIndexes, actionIndexes, keys, coins, won), offset in zip(results, bounds):
+                collected |= coins
+                if winner is None and len(won[0]):
+                    winner = (frontierIds[offset + won[0][0]], won[1][0])
+                layer.append((children, frontierIds[offset + parentIndexes], actionIndexes, keys))
+            # Keeps the best child for each key, if its key hasn't been reached before with as much health
+            children = tuple(np.concatenate([part[0][value] for part in layer]) for value in range(7))
+            childParents = np.concatenate([part[1] for part in layer])
+            childActions = np.concatenate([part[2] for part in layer])
+            keys = np.concatenate([part[3] for part in layer])
+            keys, first = bestOfEach(keys, children[4], children[5])
+            ranks = healthRank(children[4][first], children[5][first])
+            new = []
+            for key, index, rank in zip(keys.tolist(), first.tolist(), ranks.tolist()):
+                if seen.get(key, -1) < rank:
+                    seen[key] = rank
+                    new.append(index)
+            new = np.array(new, dtype=np.int64)
+            frontier = tuple(array[new] for array in children)
+            frontierIds = np.arange(len(parents), len(parents) + len(new))
+            parents.extend(childParents[new].tolist())
+            parentActions.extend(childActions[new].tolist())
+    finally:
+        if pool is not None:
+            pool.close()
+    # Rebuilds the inputs for each tick of the winning path and checks it in the single player simulation
+    if winner is not None:
+        steps = [winner[1]]
+        state = winner[0]
+        while parents[state] != -1:
+            steps.append(parentActions[state])
+            state = parents[state]
+        path = []
+        for action in reversed(steps):
+            path.append(actions[action])
+            path += [actions[action] & ~JUMP_PRESSED] * (ticksPerAction - 1)
+        simulation = engine.Simulation(engine.Level(data))
+        status, ticks = simulation.run(path)
+        if status == WON:
+            analysis.solvable = True
+            analysis.path = path[:ticks]
+            analysis.pathTicks = ticks
+    coinTiles = [(x // tileSize, y // tileSize) for x, y in zip(expander.template.coinX.tolist(),
+                                                                 expander.template.coinY.tolist())]
+    analysis.reachableCoins = [tile for tile, found in zip(coinTiles, collected) if found]
+    analysis.unreachableCoins = [tile for tile, found in zip(coinTiles, collected) if not found]
+    analysis.states = len(parents)
+    analysis.seconds = time.perf_counter() - start
+    return analysis
+
+
+def main():
+    arguments = sys.argv[1:]
+    allowDamage = '--no-damage' not in arguments
+    processes = None
+    paths = []
+    index = 0
+    while index < len(arguments):
+        if arguments[index] == '--processes':
+            index += 1
+            processes = int(arguments[index])
+        elif arguments[index] not in ('--allow-damage', '--no-damage'):
+            paths.append(arguments[index])
+        index += 1
+    if not paths:
+        paths = [f'platformer_assets/levels/level{level}_data.txt' for level in range(4)]
+        if os.path.exists('platformer_assets/levels/customlevel.txt'):
+            paths.append('platformer_assets/levels/customlevel.txt')
+    for path in paths:
+        print(path)
+        print(analyze(levelfile.loadLevel(path), processes, allowDamage))
+        print()
+
+
+if __name__ == '__main__':
+    main()
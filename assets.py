@@ -0,0 +1,296 @@
+# ======================================================================================================================
+#
+# Asset manager for the platformer game. Every image file is decoded once, and every transformed copy of it (scaled,
+# flipped or rotated) is created once and shared by all sprites that ask for it. Tile sprites are additionally packed
+# into a single texture atlas so that every block, coin, spike and flag in a level references a region of one surface
+# instead of owning its own copy.
+#
+# Once a display mode has been set, every image is converted to the display's pixel format as it is loaded so SDL
+# doesn't have to convert pixels on every blit. If the display format changes later on, convertAll() converts the
+# cache again and remap() swaps the new surfaces into the objects still holding the old ones.
+#
+# LazySound is a sound effect that is only decoded when it is first needed, so the game can put loading its sounds off
+# until after its first frame is on screen.
+#
+# Loader runs loading jobs, eg. reading files and building levels, on a worker thread so the game loop keeps drawing
+# frames while they run. Each job is polled by the main loop, which picks its result up once it is done. The asset
+# cache is shared with the worker thread, so its lookups are done under a lock.
+#
+# ======================================================================================================================
+
+import queue
+import threading
+import time
+
+import pygame
+
+
+# Converts a surface to the display format, images with per-pixel alpha keep it, colorkeyed images keep their colorkey
+def convertSurface(surface):
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    colorkey = surface.get_colorkey()
+    surface = surface.convert()
+    if colorkey is not None:
+        surface.set_colorkey(colorkey, pygame.RLEACCEL)
+    return surface
+
+
+# Pixel format of the current display, None if no display mode has been set
+def displayFormat():
+    display = pygame.display.get_surface()
+    if display is None:
+        return None
+    return display.get_bitsize(), display.get_masks()
+
+
+# Swaps surfaces replaced by AssetManager.convertAll() into the attributes of an object. Lists are updated in place so
+# every other reference to the same list sees the new surfaces too
+def remap(obj, replaced):
+    for name, value in vars(obj).items():
+        setattr(obj, name, remapValue(value, replaced))
+
+
+# Returns a value with its surfaces swapped, used by remap() on each attribute
+def remapValue(value, replaced):
+    if isinstance(value, pygame.Surface):
+        return replaced.get(value, value)
+    if isinstance(value, list):
+        value[:] = [remapValue(item, replaced) for item in value]
+    elif isinstance(value, tuple):
+        return tuple(remapValue(item, replaced) for item in value)
+    return value
+
+
+# Texture atlas, packs a set of named surfaces into one surface and hands out subsurfaces of it
+class TextureAtlas:
+    def __init__(self, surfaces, maxWidth=1024, padding=1):
+        self.regions = {}
+        # Shelf packing, tallest images first so each shelf wastes as little height as possible
+        x = 0
+        y = 0
+        shelfHeight = 0
+        atlasWidth = 0
+        for name in sorted(surfaces, key=lambda n: surfaces[n].get_height(), reverse=True):
+            w, h = surfaces[name].get_size()
+            if x + w > maxWidth and x > 0:
+                x = 0
+                y += shelfHeight + padding
+                shelfHeight = 0
+            self.regions[name] = pygame.Rect(x, y, w, h)
+            x += w + padding
+            shelfHeight = max(shelfHeight, h)
+            atlasWidth = max(atlasWidth, x)
+        self.surface = pygame.Surface((max(atlasWidth, 1), max(y + shelfHeight, 1)), pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        for name, rect in self.regions.items():
+            self.surface.blit(surfaces[name], rect)
+        self.images = {}
+        self.makeRegions()
+
+    # Creates the subsurfaces sprites draw with, one per packed image
+    def makeRegions(self):
+        for name, rect in self.regions.items():
+            self.images[name] = self.surface.subsurface(rect)
+
+    def __getitem__(self, name):
+        return self.images[name]
+
+    def __contains__(self, name):
+        return name in self.images
+
+
+# Asset manager, caches decoded images and their transformed copies. If convert is False, images are kept in the
+# format they were decoded in, eg. when there is no display
+class AssetManager:
+    def __init__(self, convert=True):
+        # Decoded images, keyed by file path
+        self.sources = {}
+        # Transformed copies, keyed by (path, size, flip, rotation)
+        self.surfaces = {}
+        self.atlases = []
+        self.convert = convert
+        # Display format the cached surfaces are currently in
+        self.displayFormat = displayFormat() if convert else None
+        self.lock = threading.RLock()
+
+    # Decodes an image the first time it is requested, afterwards returns the same surface
+    def load(self, path):
+        with self.lock:
+            if path not in self.sources:
+                image = pygame.image.load(path)
+                if self.displayFormat is not None:
+                    image = convertSurface(image)
+                self.sources[path] = image
+            return self.sources[path]
+
+    # Returns the one shared copy of an image at the given size, rotation and horizontal flip. Transformations are
+    # applied in the order rotate, scale, flip
+    def get(self, path, size=None, flip=False, rotation=0):
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (path, size, flip, rotation)
+        with self.lock:
+            if key not in self.surfaces:
+                image = self.load(path)
+                if rotation:
+                    image = pygame.transform.rotate(image, rotation)
+                if size is not None:
+                    image = pygame.transform.scale(image, size)
+                if flip:
+                    image = pygame.transform.flip(image, True, False)
+                self.surfaces[key] = image
+            return self.surfaces[key]
+
+    # Builds a texture atlas from a dictionary of name: (path, size, flip, rotation) entries, trailing entries can be
+    # left out in the same way as they can for get()
+    def buildAtlas(self, entries):
+        atlas = TextureAtlas({name: self.get(*entry) for name, entry in entries.items()})
+        if self.displayFormat is not None:
+            atlas.surface = convertSurface(atlas.surface)
+            atlas.makeRegions()
+        self.atlases.append(atlas)
+        return atlas
+
+    # Converts every cached surface to the current display format. Returns a dictionary of old surface: new surface
+    # for use with remap()
+    def convertAll(self):
+        replaced = {}
+        if not self.convert:
+            return replaced
+        with self.lock:
+            self.displayFormat = displayFormat()
+            if self.displayFormat is None:
+                return replaced
+            for cache in (self.sources, self.surfaces):
+                for key, surface in cache.items():
+                    cache[key] = replaced[surface] = convertSurface(surface)
+            for atlas in self.atlases:
+                oldImages = dict(atlas.images)
+                atlas.surface = convertSurface(atlas.surface)
+                atlas.makeRegions()
+                for name, image in oldImages.items():
+                    replaced[image] = atlas.images[name]
+        return replaced
+
+    # Converts the cache again if the display format has changed since it was last converted
+    def checkDisplayFormat(self):
+        if displayFormat() == self.displayFormat:
+            return {}
+        return self.convertAll()
+
+    # Total pixel memory held by the cache, in bytes
+    def memoryUsage(self):
+        surfaces = list(self.sources.values()) + list(self.surfaces.values())
+        surfaces += [atlas.surface for atlas in self.atlases]
+        return sum(surface.get_bytesize() * surface.get_width() * surface.get_height() for surface in surfaces)
+
+
+# Sound effect, decoded by load() or the first time it is played
+class LazySound:
+    def __init__(self, path, volume=None):
+        self.path = path
+        self.volume = volume
+        self.sound = None
+
+    # Decodes the sound if it hasn't been yet, returns the pygame Sound
+    def load(self):
+        if self.sound is None:
+            self.sound = pygame.mixer.Sound(self.path)
+            if self.volume is not None:
+                self.sound.set_volume(self.volume)
+        return self.sound
+
+    def play(self, *args):
+        return self.load().play(*args)
+
+    def stop(self):
+        if self.sound is not None:
+            self.sound.stop()
+
+
+# Reads a whole file, eg. a music track to be played from memory
+def readFile(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+# Loading job, done once it has run. result() returns what the job's function returned, or raises what it raised
+class LoadJob:
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+        self.done = False
+        self.value = None
+        self.error = None
+        # Time the job took to run
+        self.seconds = 0
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.value = self.function(*self.args)
+        except Exception as error:
+            self.error = error
+        self.seconds = time.perf_counter() - start
+        self.done = True
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+# Runs loading jobs one after another on a worker thread, started with the first job. If threaded is False, jobs are
+# run as they are submitted instead, eg. for tests that need the game to run the same way every time
+class Loader:
+    def __init__(self, threaded=True):
+        self.threaded = threaded
+        self.jobs = queue.Queue()
+        self.thread = None
+        # Jobs submitted and finished since the loader was last idle, for showing progress
+        self.submitted = 0
+        self.finished = 0
+
+    # Queues a function to be run on the worker thread, returns its job
+    def submit(self, function, *args):
+        job = LoadJob(function, args)
+        if not self.threaded:
+            job.run()
+            return job
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.work, name='Loader', daemon=True)
+            self.thread.start()
+        if self.submitted == self.finished:
+            self.submitted = self.finished = 0
+        self.submitted += 1
+        self.jobs.put(job)
+        return job
+
+    # Runs a function straight away on the calling thread, for work too small to be worth a frame of loading screen.
+    # Returns its job, already done
+    def run(self, function, *args):
+        job = LoadJob(function, args)
+        job.run()
+        return job
+
+    # Worker thread
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            job.run()
+            self.finished += 1
+            self.jobs.task_done()
+
+    # Whether any jobs are waiting or running
+    def busy(self):
+        return self.finished < self.submitted
+
+    # Fraction of the jobs submitted since the loader was last idle that have finished
+    def progress(self):
+        return self.finished / self.submitted if self.submitted else 1
+
+    # Blocks until every job submitted has finished
+    def wait(self):
+        if self.thread is not None:
+            self.jobs.join()
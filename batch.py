@@ -0,0 +1,252 @@
+# ======================================================================================================================
+#
+# Batched simulation, runs many independent players through the same level at once, eg. for training bots.
+#
+# Every player's state is kept in NumPy arrays and a single step() advances all of them by one tick, following the
+# same rules as engine.Simulation. The level's layout is shared: stationary blocks are a grid of solid tiles, and
+# moving blocks and spike balls only depend on how many ticks a player has been in the level, so their positions are
+# looked up from the engine's tables of one full movement cycle instead of being simulated for each player. Coins are
+# tracked per player since each player collects their own.
+#
+# Only what affects gameplay is simulated, the player's pose, wing animation and the camera are left out.
+#
+# Usage:
+#     batch = BatchSimulation(readLevel('platformer_assets/levels/level0_data.txt'), 4096)
+#     status = batch.step(inputs)
+#     batch.reset(status != PLAYING)
+#
+# Requires NumPy, which the game itself doesn't need.
+#
+# ======================================================================================================================
+
+import numpy as np
+import engine
+from engine import (tileSize, LEFT, RIGHT, JUMP, SHORT_JUMP, JUMP_PRESSED, PLAYING, DEAD, WON, JUMPED, DAMAGED, COIN,
+                    FINISHED, DIED)
+
+playerWidth = 45
+playerHeight = 80
+
+
+# Returns True where rect a overlaps rect b, same as pygame.Rect.colliderect for rects with a size
+def overlaps(ax, ay, aw, ah, bx, by, bw, bh):
+    return (ax < bx + bw) & (ax + aw > bx) & (ay < by + bh) & (ay + ah > by)
+
+
+# Times of impact of rects a moving by (moveX, moveY) with rects b, the same as engine.sweep. Returns where they meet
+# within the tick, and where they meet on the top or bottom of b rather than a side
+def sweep(ax, ay, aw, ah, bx, by, bw, bh, moveX, moveY):
+    entryX, exitX, apartX = sweepAxis(ax, aw, bx, bw, moveX)
+    entryY, exitY, apartY = sweepAxis(ay, ah, by, bh, moveY)
+    entry = np.maximum(entryX, entryY)
+    hit = (~overlaps(ax, ay, aw, ah, bx, by, bw, bh) & ~apartX & ~apartY & (entry >= 0) & (entry < 1)
+           & (entry < np.minimum(exitX, exitY)))
+    return hit, entryX <= entryY
+
+
+# Entry and exit times of a span moving by move through another span on one axis, and where they never meet because
+# the span isn't moving on the axis and doesn't overlap the other
+def sweepAxis(start, size, otherStart, otherSize, move):
+    toward = np.where(move > 0, otherStart - (start + size), otherStart + otherSize - start)
+    away = np.where(move > 0, otherStart + otherSize - start, otherStart - (start + size))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entry = np.where(move != 0, toward / move, -np.inf)
+        exit = np.where(move != 0, away / move, np.inf)
+    apart = (move == 0) & ((start + size <= otherStart) | (start >= otherStart + otherSize))
+    return entry, exit, apart
+
+
+# Batched simulation of count players in one level. wings, fly and cheats work the same as in engine.Simulation and
+# apply to every player
+class BatchSimulation:
+    # Ticks in a full moving block and spike ball movement cycle
+    blockPeriod = engine.MovingBlock.period
+    ballPeriod = engine.SpikeBall.period
+
+    def __init__(self, data, count, cheats=False, wings=True, fly=False):
+        self.count = count
+        self.cheats = cheats
+        self.wings = wings
+        self.fly = fly
+        level = engine.Level(data, streaming=False)
+        # Stationary blocks, as a grid of solid tiles
+        self.solid = np.zeros((level.blockGrid.rows, level.blockGrid.columns), dtype=bool)
+        for column, row in level.blockGrid.cells:
+            self.solid[row, column] = True
+        # Starting positions of the moving objects, in the order the single player simulation checks them in
+        self.blockX, self.blockY, self.blockAxis = self.positions(level.movingBlocks, 'axis')
+        self.ballX, self.ballY = self.positions(level.balls)
+        self.spikeX, self.spikeY = self.positions(level.spikes)
+        self.coinX, self.coinY = self.positions(level.coins)
+        self.finishX, self.finishY = self.positions(level.finishFlags)
+        # Offsets of the moving objects from their starting positions for each tick of their movement cycles, the
+        # engine's own tables
+        self.blockOffsets = np.array(engine.MovingBlock.offsets, dtype=np.int64)
+        self.ballOffsets = np.array(engine.SpikeBall.offsets, dtype=np.int64)
+        # Player state, one entry per player
+        self.x = np.zeros(count, dtype=np.int64)
+        self.y = np.zeros(count, dtype=np.int64)
+        self.yVel = np.zeros(count, dtype=np.int64)
+        self.onBlock = np.zeros(count, dtype=bool)
+        self.health = np.zeros(count, dtype=np.int64)
+        self.damageCD = np.zeros(count, dtype=np.int64)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.status = np.zeros(count, dtype=np.int64)
+        self.events = np.zeros(count, dtype=np.int64)
+        # Level ticks each player has played, which sets where the level's moving objects are for them
+        self.ticks = np.zeros(count, dtype=np.int64)
+        self.coinsLeft = np.zeros((count, len(self.coinX)), dtype=bool)
+        self.reset()
+
+    # Starting positions of the objects in a group, plus any extra attributes named, row by row through the level
+    def positions(self, group, *attributes):
+        objects = sorted(group.sprites(), key=lambda obj: obj.origin[::-1])
+        arrays = [np.array([obj.rect.x for obj in objects], dtype=np.int64),
+                  np.array([obj.rect.y for obj in objects], dtype=np.int64)]
+        for attribute in attributes:
+            arrays.append(np.array([getattr(obj, attribute) for obj in objects], dtype=np.int64))
+        return arrays
+
+    # Restarts the level for the players selected, a boolean mask or a list of indexes. Restarts every player if none
+    # are given
+    def reset(self, players=None):
+        if players is None:
+            players = slice(None)
+        self.x[players] = engine.spawnX
+        self.y[players] = engine.spawnY
+        self.yVel[players] = 0
+        self.onBlock[players] = False
+        self.health[players] = 5
+        self.damageCD[players] = 0
+        self.score[players] = 0
+        self.status[players] = PLAYING
+        self.events[players] = 0
+        self.ticks[players] = 0
+        self.coinsLeft[players] = True
+
+    # Runs one tick for every player, inputs is an array of input flags with one entry per player. Players that have
+    # finished or died don't move until they are reset. Returns the status of every player
+    def step(self, inputs):
+        inputs = np.asarray(inputs, dtype=np.int64)
+        active = self.status == PLAYING
+        x = self.x
+        y = self.y
+        events = np.zeros(self.count, dtype=np.int64)
+
+        # Jumps if the player was on a block last tick
+        jumped = active & (inputs & JUMP_PRESSED != 0) & self.onBlock
+        yVel = np.where(jumped, np.where(inputs & SHORT_JUMP != 0, -16, -21), self.yVel)
+        events[jumped] |= JUMPED
+        onBlock = np.zeros(self.count, dtype=bool)
+
+        # Moves the level's objects
+        self.ticks += active
+        blockPhase = self.ticks % self.blockPeriod
+        blockOffsets = self.blockOffsets[blockPhase][:, None]
+        blockMoves = blockOffsets - self.blockOffsets[(self.ticks - 1) % self.blockPeriod][:, None]
+        blockX = self.blockX + np.where(self.blockAxis == 0, blockOffsets, 0)
+        blockY = self.blockY + np.where(self.blockAxis == 1, blockOffsets, 0)
+        blockMoveX = np.where(self.blockAxis == 0, blockMoves, 0)
+        blockMoveY = np.where(self.blockAxis == 1, blockMoves, 0)
+        ballX = self.ballX + self.ballOffsets[self.ticks % self.ballPeriod][:, None]
+
+        # Player and mob collisions, coin collisions, and finish line collision
+        px = x[:, None]
+        py = y[:, None]
+        hurt = (overlaps(px, py, playerWidth, playerHeight, ballX, self.ballY, tileSize, tileSize).any(axis=1)
+                | overlaps(px, py, playerWidth, playerHeight, self.spikeX, self.spikeY, tileSize, tileSize // 2)
+                .any(axis=1))
+        damaged = active & hurt & (self.damageCD == 0) & (not self.cheats)
+        health = self.health - damaged
+        damageCD = np.where(damaged, 1, self.damageCD)
+        events[damaged] |= DAMAGED
+        coins = self.coinsLeft & active[:, None] & overlaps(px, py, playerWidth, playerHeight, self.coinX, self.coinY,
+                                                            tileSize, tileSize)
+        collected = coins.any(axis=1)
+        self.coinsLeft &= ~coins
+        self.score += collected
+        events[collected] |= COIN
+        finished = active & overlaps(px, py, playerWidth, playerHeight, self.finishX, self.finishY, tileSize,
+                                     int(tileSize * 1.5)).any(axis=1)
+        status = np.where(finished, WON, self.status)
+        events[finished] |= FINISHED
+
+        # Player movement
+        moveX = np.where(inputs & LEFT != 0, -5, 0) + np.where(inputs & RIGHT != 0, 5, 0)
+        holdingJump = inputs & JUMP != 0
+        falling = np.where(yVel < 10, yVel + 1, 10)
+        if self.fly:
+            yVel = np.where(holdingJump, np.where(yVel > -10, yVel - 2, -10), falling)
+        elif self.wings:
+            yVel = np.where(holdingJump, np.where(yVel < 0, yVel + 1, 3), falling)
+        else:
+            yVel = falling
+        moveY = yVel.copy()
+
+        # Moving blocks collision, swept from where each block started the tick
+        for block in range(len(self.blockX)):
+            bx = blockX[:, block]
+            by = blockY[:, block]
+            relativeX = moveX - blockMoveX[:, block]
+            relativeY = moveY - blockMoveY[:, block]
+            hit, vertical = sweep(x, y, playerWidth, playerHeight, bx - blockMoveX[:, block], by - blockMoveY[:, block],
+                                  tileSize, tileSize // 2, relativeX, relativeY)
+            # Collisions with the left and right sides of the block
+            side = hit & ~vertical
+            moveX = np.where(side, np.where(relativeX > 0, bx - (x + playerWidth), bx + tileSize - x), moveX)
+            # Collisions with the bottom and top of the block, the player is carried along with blocks they are on
+            hitBottom = hit & vertical & (relativeY < 0)
+            yVel = np.where(hitBottom, 0, yVel)
+            moveY = np.where(hitBottom, by + tileSize // 2 - y, moveY)
+            hitTop = hit & vertical & (relativeY >= 0)
+            moveY = np.where(hitTop, by - (y + playerHeight) - 1, moveY)
+            moveX = np.where(hitTop, moveX + blockMoveX[:, block], moveX)
+            onBlock |= hitTop
+
+        # Collisions for stationary blocks, the tiles around the area each player can move through are checked row by
+        # row in the same order as engine.Level.blocksNear returns them
+        rows, columns = self.solid.shape
+        sweptX = np.minimum(x, x + moveX) - tileSize
+        sweptY = np.minimum(y, y + moveY) - (tileSize + playerHeight)
+        sweptRight = np.maximum(x, x + moveX) + playerWidth + tileSize
+        sweptBottom = np.maximum(y, y + moveY) + playerHeight + tileSize + playerHeight
+        firstColumn = np.maximum(sweptX // tileSize, 0)
+        lastColumn = np.minimum((sweptRight - 1) // tileSize, columns - 1)
+        firstRow = np.maximum(sweptY // tileSize, 0)
+        lastRow = np.where(active, np.minimum((sweptBottom - 1) // tileSize, rows - 1), -1)
+        for row in range(max(int((lastRow - firstRow).max(initial=-1)) + 1, 0)):
+            tileRow = firstRow + row
+            for column in range(max(int((lastColumn - firstColumn).max(initial=-1)) + 1, 0)):
+                tileColumn = firstColumn + column
+                solid = (tileRow <= lastRow) & (tileColumn <= lastColumn)
+                solid &= self.solid[np.minimum(tileRow, rows - 1), np.minimum(tileColumn, columns - 1)]
+                if not solid.any():
+                    continue
+                bx = tileColumn * tileSize
+                by = tileRow * tileSize
+                horizontal = solid & overlaps(x + moveX, y, playerWidth, playerHeight, bx, by, tileSize, tileSize)
+                moveX = np.where(horizontal, 0, moveX)
+                vertical = solid & ~horizontal & overlaps(x, y + moveY, playerWidth, playerHeight, bx, by, tileSize,
+                                                          tileSize)
+                # Moving up, the player stops under the block. Moving down, the player lands on it
+                up = vertical & (yVel < 0)
+                down = vertical & (yVel >= 0)
+                moveY = np.where(up, by + tileSize - y, moveY)
+                yVel = np.where(up, 0, yVel)
+                moveY = np.where(down, by - (y + playerHeight), moveY)
+                onBlock |= down
+
+        # Applies the tick to the players still playing, if a player has no more health, kills player
+        self.x = np.where(active, x + moveX, x)
+        self.y = np.where(active, y + moveY, y)
+        self.yVel = np.where(active, yVel, self.yVel)
+        self.onBlock = onBlock & active
+        died = active & (health <= 0)
+        self.status = np.where(died, DEAD, status)
+        events[died] |= DIED
+        self.health = health
+        self.events = events
+        # Damage cooldown
+        damageCD = np.where(damageCD != 0, damageCD + 1, 0)
+        self.damageCD = np.where(damageCD >= engine.FPS, 0, damageCD)
+        return self.status
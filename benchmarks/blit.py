@@ -0,0 +1,76 @@
+# ======================================================================================================================
+#
+# Blit benchmark, compares the per-frame cost of drawing a typical game frame with images left in the format they were
+# decoded in against images converted to the display format.
+#
+# Run from the game folder:
+#     python -m benchmarks.blit [frames]
+#
+# Uses the SDL dummy video driver unless SDL_VIDEODRIVER is already set, so set it to your platform's driver (eg.
+# 'windows', 'x11', 'cocoa') to measure against a real display.
+#
+# ======================================================================================================================
+
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from assets import AssetManager
+
+width = 1000
+height = 900
+tileSize = 50
+
+
+# Loads the images drawn in a frame of gameplay: background, tiles, coins, player and the pause button
+def loadScene(assets):
+    scene = [(assets.load('platformer_assets/background/night.jpeg'), (0, 0))]
+    tiles = ['dirt', 'grass_center', 'grass_left', 'grass_right', 'movingBlock']
+    for column in range(width // tileSize):
+        for row in range(12, 18):
+            image = assets.get(f'platformer_assets/img/{tiles[(column + row) % len(tiles)]}.png', (tileSize, tileSize))
+            scene.append((image, (column * tileSize, row * tileSize)))
+    for coin in range(20):
+        scene.append((assets.get(f'platformer_assets/img/coin{coin % 6 + 1}.png'), (coin * tileSize, 200)))
+    for ball in range(10):
+        scene.append((assets.get('platformer_assets/img/spikeBall1.png', (tileSize, tileSize)), (ball * 100, 400)))
+    scene.append((assets.get('platformer_assets/img/player1.png', (60, 90)), (375, 500)))
+    scene.append((assets.get('platformer_assets/buttons/btndefault.png', (2 * tileSize, tileSize)), (width - 125, 10)))
+    for heart in range(5):
+        scene.append((assets.get('platformer_assets/img/heart.png'), (400 + heart * 38, 3)))
+    return scene
+
+
+# Draws the scene the given number of times, returns the average milliseconds per frame
+def timeScene(screen, scene, frames):
+    start = time.perf_counter()
+    for frame in range(frames):
+        for image, pos in scene:
+            screen.blit(image, pos)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    unconverted = loadScene(AssetManager(convert=False))
+    converted = loadScene(AssetManager())
+    # Warm up so both runs start with the same caches
+    timeScene(screen, unconverted, 10)
+    timeScene(screen, converted, 10)
+    before = timeScene(screen, unconverted, frames)
+    after = timeScene(screen, converted, frames)
+    print(f'Video driver: {pygame.display.get_driver()}, display format: {screen.get_bitsize()} bit')
+    print(f'Blits per frame: {len(unconverted)}, frames: {frames}')
+    print(f'Unconverted: {before:.3f} ms/frame')
+    print(f'Converted:   {after:.3f} ms/frame')
+    print(f'Speedup:     {before / after:.2f}x')
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
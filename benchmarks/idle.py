@@ -0,0 +1,47 @@
+# ======================================================================================================================
+#
+# Idle benchmark, measures how much of a CPU core the game uses while it sits on the main menu with nothing happening,
+# eg. on a kiosk between players.
+#
+# Run from the game folder:
+#     python -m benchmarks.idle [seconds]
+#
+# The game is left on the main menu (python platformer.py --idle-benchmark) with the SDL dummy video and audio drivers,
+# once with idle throttling on and once with it off (--full-rate), and the share of a core each run used is printed,
+# overall and in its idle frames. The startup steps run after the first frame are part of each run, so the overall
+# share is a little above the idle one.
+#
+# ======================================================================================================================
+
+import json
+import os
+import subprocess
+import sys
+
+defaultSeconds = 10
+runs = {'idle throttle': [], 'full rate': ['--full-rate']}
+
+
+# Leaves the game on the main menu for a number of seconds, returns the game's summary of the run
+def runGame(seconds, arguments):
+    environment = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    output = subprocess.run([sys.executable, 'platformer.py', '--idle-benchmark', str(seconds), *arguments],
+                            env=environment, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+# Formats a share of a core, None if the run had no frames of that kind
+def formatPercent(percent):
+    return 'n/a' if percent is None else f'{percent:.1f}%'
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else defaultSeconds
+    for name, arguments in runs.items():
+        summary = runGame(seconds, arguments)
+        print(f'{name:<14}{summary["frames"] / summary["seconds"]:7.1f} FPS, CPU {formatPercent(summary["cpuPercent"])}'
+              f' of a core, {formatPercent(summary["idleCpuPercent"])} in idle frames')
+
+
+if __name__ == '__main__':
+    main()
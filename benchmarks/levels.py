@@ -0,0 +1,86 @@
+# ======================================================================================================================
+#
+# Synthetic level generator, builds levels of any length in the level file tile encoding for benchmarking.
+#
+# Every level has a solid floor, a wall on its left edge, an empty area around the spawn point and a finish flag at its
+# far end. The area above the floor is filled at random with floating platforms, moving blocks (both axes), spike balls
+# and coins, each at its own density: the chance of any one tile being that object. Platforms are kept out of the rows
+# the player runs along on the floor, so a player running right is never walled in.
+#
+# Write a generated level to a file, eg. to play it as the custom level:
+#     python -m benchmarks.levels <columns> <file> [seed]
+# The file is written in the binary format if its name ends in .lvl, otherwise as a text level.
+#
+# ======================================================================================================================
+
+import random
+import sys
+
+import levelfile
+
+rows = 18
+# Columns at the start of the level kept free of objects, the player spawns in them
+spawnColumns = 10
+# Tiles
+dirt = 1
+grassCenter = 3
+platform = 6
+horizontalBlock = 8
+verticalBlock = 9
+spikeBall = 10
+coin = 13
+finish = 14
+
+
+# Generates a level, columns wide. Densities are the chance of each tile above the floor being that kind of object
+def generateLevel(columns, seed=0, blocks=0.08, movingBlocks=0.01, spikeBalls=0.01, coins=0.04):
+    rng = random.Random(seed)
+    data = [[0] * columns for row in range(rows)]
+    # Floor of grass over dirt, and a wall on the left edge
+    for column in range(columns):
+        data[rows - 2][column] = grassCenter
+        data[rows - 1][column] = dirt
+    for row in range(rows - 2):
+        data[row][0] = dirt
+    # Objects, platforms stay above the two rows the player takes up when standing on the floor
+    for row in range(2, rows - 3):
+        for column in range(spawnColumns, columns - 2):
+            roll = rng.random()
+            if roll < blocks:
+                if row < rows - 5:
+                    data[row][column] = platform
+            elif roll < blocks + movingBlocks:
+                data[row][column] = rng.choice((horizontalBlock, verticalBlock))
+            elif roll < blocks + movingBlocks + spikeBalls:
+                data[row][column] = spikeBall
+            elif roll < blocks + movingBlocks + spikeBalls + coins:
+                data[row][column] = coin
+    data[rows - 3][columns - 2] = finish
+    return data
+
+
+# Writes a level as a text level file, the same layout as the game's levels
+def writeTextLevel(data, path):
+    with open(path, 'w') as lvlFile:
+        lvlFile.write('\n'.join(', '.join(str(tile) for tile in row) for row in data))
+
+
+# Writes a level in the format its file name asks for
+def writeLevel(data, path):
+    if path.endswith(levelfile.extension):
+        with open(path, 'wb') as lvlFile:
+            lvlFile.write(levelfile.packLevel(data))
+    else:
+        writeTextLevel(data, path)
+
+
+def main():
+    columns = int(sys.argv[1])
+    path = sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    writeLevel(generateLevel(columns, seed), path)
+    print(f'{columns} column level -> {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# ======================================================================================================================
+#
+# Loading benchmark, checks that the game loop keeps drawing frames on time while levels and sounds load, by timing
+# the gaps between frames drawn during a level transition.
+#
+# Run from the game folder:
+#     python -m benchmarks.loading [repeats]
+#
+# Each transition builds every level in the level pack in full, reads every music track and decodes every sound
+# effect, the same work as loading a level and its music but more of it. It is run twice: once with the loading jobs
+# run on the main thread within one frame, the way levels used to be loaded, and once on the loader thread. The run
+# fails (exit status 1) if a frame drawn while the loader thread is working takes longer than latencyBudget.
+#
+# Uses the SDL dummy video and audio drivers unless they are already set.
+#
+# ======================================================================================================================
+
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import engine
+import levelfile
+from assets import Loader, readFile
+
+width = 1000
+height = 900
+frameRate = 60
+# Longest time allowed between two frames, in milliseconds
+latencyBudget = 2 * 1000 / frameRate
+sounds = ['click', 'coin', 'damage', 'death', 'finish', 'jump', 'startup', 'walk']
+musicTracks = 4
+
+
+# Loading jobs of a level transition
+def transitionJobs(levelPack):
+    jobs = [(engine.Level, levelPack.level(level), engine.viewWidth, False) for level in range(len(levelPack))]
+    jobs += [(readFile, f'platformer_assets/audio/musicTrack{track}.ogg') for track in range(1, musicTracks + 1)]
+    jobs += [(pygame.mixer.Sound, f'platformer_assets/audio/{sound}.ogg') for sound in sounds]
+    return jobs
+
+
+# Draws a loading screen frame, as the game does while a level loads
+def drawFrame(screen, font, progress):
+    screen.fill((20, 20, 40))
+    pygame.draw.rect(screen, (255, 204, 0), pygame.Rect(275, 350, 450, 200), 0, 50)
+    screen.blit(font.render('Loading...', True, (255, 255, 255)), (width // 2 - 110, 375))
+    pygame.draw.rect(screen, (255, 255, 255), (329, 479, 342 * progress, 17))
+    pygame.display.flip()
+
+
+# Runs a transition's jobs while drawing frames, returns the milliseconds between each frame and the next. Without a
+# loader thread, every job is run before the first frame
+def timeTransition(screen, font, jobs, threaded):
+    loader = Loader(threaded)
+    clock = pygame.time.Clock()
+    clock.tick(frameRate)
+    frameTimes = []
+    last = time.perf_counter()
+    running = [loader.submit(*job) for job in jobs]
+    while True:
+        drawFrame(screen, font, loader.progress())
+        clock.tick(frameRate)
+        now = time.perf_counter()
+        frameTimes.append((now - last) * 1000)
+        last = now
+        if all(job.done for job in running):
+            break
+    for job in running:
+        job.result()
+    return frameTimes
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    font = pygame.font.Font('platformer_assets/simply_rounded.ttf', 50)
+    jobs = transitionJobs(levelfile.LevelPack(levelfile.gamePack))
+    print(f'{len(jobs)} loading jobs per transition, latency budget {latencyBudget:.1f} ms')
+    passed = True
+    for threaded in (False, True):
+        frameTimes = []
+        for repeat in range(repeats):
+            frameTimes += timeTransition(screen, font, jobs, threaded)
+        worst = max(frameTimes)
+        print(f'{"Loader thread" if threaded else "Main thread"}: {len(frameTimes)} frames, '
+              f'average {sum(frameTimes) / len(frameTimes):.1f} ms, worst {worst:.1f} ms')
+        if threaded and worst > latencyBudget:
+            passed = False
+    print('Passed' if passed else f'FAILED, a frame took longer than {latencyBudget:.1f} ms')
+    pygame.quit()
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
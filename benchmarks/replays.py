@@ -0,0 +1,70 @@
+# ======================================================================================================================
+#
+# Replay check, checks that a recorded attempt at a level replays to the same end state when the attempt was started
+# straight after finishing another level mid-jump, with the player still moving.
+#
+# Run from the game folder:
+#     python -m benchmarks.replays [attempts]
+#
+# Each attempt is played the way the game plays it: one player is kept from level to level and moved to the start of
+# each with respawn(). The first level is a synthetic level from benchmarks.levels, played jumping to the right until
+# the finish is reached in the air. The second level is then played with seeded random input, and replayed from a
+# new player as a replay does. The check fails (exit status 1) if any replay ends somewhere else.
+#
+# ======================================================================================================================
+
+import sys
+
+import engine
+from benchmarks.levels import generateLevel
+from engine import RIGHT, JUMP, JUMP_PRESSED, PLAYING, WON
+
+defaultAttempts = 40
+attemptTicks = 900
+# Most ticks spent reaching the first level's finish
+finishTicks = 2000
+
+
+# Plays a level jumping to the right, returns True if its finish was reached with the player in the air
+def finishMidJump(player, data):
+    simulation = engine.Simulation(engine.Level(data), player, cheats=True)
+    for tick in range(finishTicks):
+        inputs = RIGHT | JUMP | (JUMP_PRESSED if tick % 25 == 0 else 0)
+        if simulation.step(inputs) != PLAYING:
+            break
+    return simulation.status == WON and player.yVel != 0
+
+
+# Plays an attempt at a level from where the player is, returns the state it ends in
+def playAttempt(player, data, inputs):
+    player.respawn(engine.spawnX, engine.spawnY)
+    simulation = engine.Simulation(engine.Level(data), player)
+    simulation.run(inputs)
+    return simulation.state()
+
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else defaultAttempts
+    checked = 0
+    mismatches = 0
+    seed = 0
+    while checked < attempts:
+        seed += 1
+        player = engine.Player(engine.spawnX, engine.spawnY)
+        if not finishMidJump(player, generateLevel(20, seed, blocks=0.02, movingBlocks=0, spikeBalls=0)):
+            continue
+        data = generateLevel(60, seed)
+        inputs = engine.randomInputs(seed, attemptTicks)
+        recorded = playAttempt(player, data, inputs)
+        replayed = playAttempt(engine.Player(engine.spawnX, engine.spawnY), data, inputs)
+        checked += 1
+        if replayed != recorded:
+            mismatches += 1
+            print(f'Seed {seed}: recorded {recorded}, replayed {replayed}')
+    print(f'{attempts - mismatches} / {attempts} replays matched')
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
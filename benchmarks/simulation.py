@@ -0,0 +1,67 @@
+# ======================================================================================================================
+#
+# Simulation benchmark, measures how many ticks a second the headless simulation core runs through each level in the
+# game's level pack, with no display or audio.
+#
+# Run from the game folder:
+#     python -m benchmarks.simulation [ticks]
+#
+# The player is driven by seeded random input (mostly running right, jumping and gliding now and then) with cheats on
+# so a run isn't cut short by dying. A level that is finished early is restarted until the tick count is reached.
+#
+# If NumPy is installed, the batched simulation is measured as well, stepping batchSize players through each level at
+# once.
+#
+# ======================================================================================================================
+
+import sys
+import time
+
+import engine
+import levelfile
+
+try:
+    import numpy as np
+    from batch import BatchSimulation
+except ImportError:
+    BatchSimulation = None
+
+batchSize = 4096
+batchTicks = 200
+
+
+# Runs the inputs through a level, returns the ticks run per second
+def timeLevel(data, inputs):
+    start = time.perf_counter()
+    simulation = engine.Simulation(engine.Level(data), cheats=True)
+    for tickInputs in inputs:
+        if simulation.step(tickInputs) != engine.PLAYING:
+            simulation = engine.Simulation(engine.Level(data), cheats=True)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+# Steps a batch of players with random inputs through a level, returns the player ticks run per second
+def timeBatch(data, seed):
+    rng = np.random.default_rng(seed)
+    inputs = rng.choice([0, engine.LEFT, engine.RIGHT, engine.RIGHT | engine.JUMP,
+                         engine.RIGHT | engine.JUMP | engine.JUMP_PRESSED], (batchTicks, batchSize))
+    start = time.perf_counter()
+    batch = BatchSimulation(data, batchSize, cheats=True)
+    for tickInputs in inputs:
+        batch.reset(batch.step(tickInputs) != engine.PLAYING)
+    return batchTicks * batchSize / (time.perf_counter() - start)
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f'Ticks per level: {ticks}')
+    levelPack = levelfile.LevelPack(levelfile.gamePack)
+    for level in range(len(levelPack)):
+        data = levelPack.level(level)
+        print(f'{levelPack.names[level]}: {timeLevel(data, engine.randomInputs(level, ticks)):,.0f} ticks/s')
+        if BatchSimulation is not None:
+            print(f'    batch of {batchSize}: {timeBatch(data, level):,.0f} player ticks/s')
+
+
+if __name__ == '__main__':
+    main()
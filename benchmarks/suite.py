@@ -0,0 +1,154 @@
+# ======================================================================================================================
+#
+# Benchmark suite, runs the game headless on synthetic levels of different sizes and densities and records how it
+# performs, so runs can be compared over time.
+#
+# Run from the game folder:
+#     python -m benchmarks.suite [ticks]
+#     python -m benchmarks.suite --compare [earlier run] [later run]
+#
+# Each scenario's level is generated by benchmarks.levels and played by the game in benchmark mode (python platformer.py
+# --benchmark), with the SDL dummy video and audio drivers, seeded random input and one tick per frame as fast as the
+# game can go. The game's frame profile is written to a CSV file and summarised here as:
+#     - world build time, ticks per second, and the game's peak memory and image memory
+#     - average blits per frame, onto the screen and the drawing layers and compositing them, and average texts
+#       rendered by a font per frame
+#     - p50, p95 and p99 milliseconds per frame of the whole frame, of the update (moving objects, the camera and the
+#       rest of the game logic), of the collision checks and of rendering (drawing the level, the scene, compositing
+#       and the display update)
+#
+# Every run is appended to resultsPath as one JSON record with the time, the git commit and the Python and pygame
+# versions. --compare prints the change in every result between two runs, by default the last two. Runs are numbered
+# from 1, negative numbers count back from the latest.
+#
+# ======================================================================================================================
+
+import csv
+import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+import levelfile
+from benchmarks.levels import generateLevel
+from profiler import percentile
+
+resultsPath = 'benchmarks/results.jsonl'
+defaultTicks = 1200
+# Frames at the start of each run left out of the frame times, while the level loads and the caches warm up
+warmupFrames = 30
+# Level generator settings of each scenario
+scenarios = {
+    'short sparse': {'columns': 100, 'blocks': 0.04, 'movingBlocks': 0.005, 'spikeBalls': 0.005, 'coins': 0.02},
+    'short dense': {'columns': 100, 'blocks': 0.2, 'movingBlocks': 0.03, 'spikeBalls': 0.03, 'coins': 0.1},
+    'long sparse': {'columns': 1000, 'blocks': 0.04, 'movingBlocks': 0.005, 'spikeBalls': 0.005, 'coins': 0.02},
+    'long dense': {'columns': 1000, 'blocks': 0.2, 'movingBlocks': 0.03, 'spikeBalls': 0.03, 'coins': 0.1},
+    'huge': {'columns': 10000, 'blocks': 0.08, 'movingBlocks': 0.01, 'spikeBalls': 0.01, 'coins': 0.04},
+}
+# Frame profile phases making up each part of a frame that is reported
+parts = {
+    'frame': ['frame'],
+    'update': ['events', 'objects', 'camera', 'game'],
+    'collision': ['collisions'],
+    'render': ['level drawing', 'scene', 'compositing', 'display'],
+}
+
+
+# Plays a level file in the game's benchmark mode, returns the game's summary of the run and its frame profile rows
+def runGame(levelPath, csvPath, ticks, seed):
+    environment = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    output = subprocess.run([sys.executable, 'platformer.py', '--benchmark', levelPath, str(ticks), str(seed),
+                             '--profile-csv', csvPath], env=environment, capture_output=True, text=True, check=True)
+    summary = json.loads(output.stdout.strip().splitlines()[-1])
+    with open(csvPath, newline='') as csvFile:
+        rows = list(csv.DictReader(csvFile))
+    return summary, rows
+
+
+# Results of one scenario
+def runScenario(settings, ticks, seed, folder):
+    levelPath = os.path.join(folder, 'level' + levelfile.extension)
+    with open(levelPath, 'wb') as lvlFile:
+        lvlFile.write(levelfile.packLevel(generateLevel(seed=seed, **settings)))
+    summary, rows = runGame(levelPath, os.path.join(folder, 'frames.csv'), ticks, seed)
+    rows = rows[warmupFrames:]
+    results = {'buildMs': summary['buildMs'], 'ticksPerSecond': summary['ticksPerSecond'],
+               'peakMemoryMB': summary['peakMemory'] / 2 ** 20 if summary['peakMemory'] is not None else None,
+               'imageMemoryMB': summary['imageMemory'] / 2 ** 20,
+               'blitsPerFrame': sum(int(row['blits']) for row in rows) / len(rows),
+               'textRendersPerFrame': sum(int(row['text renders']) for row in rows) / len(rows)}
+    for part, phases in parts.items():
+        times = [sum(float(row[f'{phase} ms']) for phase in phases) for row in rows]
+        for percent in (50, 95, 99):
+            results[f'{part}P{percent}Ms'] = percentile(times, percent)
+    return results
+
+
+# Git commit of the game folder, None if it isn't a git checkout
+def gitCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Runs every scenario and appends the results to the results file
+def runSuite(ticks, seed=0):
+    record = {'time': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': gitCommit(),
+              'python': platform.python_version(), 'pygame': importlib.metadata.version('pygame'), 'ticks': ticks,
+              'scenarios': {}}
+    with tempfile.TemporaryDirectory() as folder:
+        for name, settings in scenarios.items():
+            results = runScenario(settings, ticks, seed, folder)
+            record['scenarios'][name] = results
+            print(f'{name} ({settings["columns"]} columns)')
+            print(f'    build {results["buildMs"]:.1f} ms, {results["ticksPerSecond"]:.0f} ticks/s, '
+                  f'peak memory {formatValue(results["peakMemoryMB"])} MB, '
+                  f'images {results["imageMemoryMB"]:.1f} MB, {results["blitsPerFrame"]:.1f} blits/frame, '
+                  f'{results["textRendersPerFrame"]:.2f} text renders/frame')
+            for part in parts:
+                print(f'    {part:<10}' + '  '.join(f'p{percent} {results[f"{part}P{percent}Ms"]:6.2f} ms'
+                                                    for percent in (50, 95, 99)))
+    with open(resultsPath, 'a') as resultsFile:
+        resultsFile.write(json.dumps(record) + '\n')
+    print(f'Results added to {resultsPath}')
+
+
+# Formats a result the platform may not have been able to measure
+def formatValue(value):
+    return 'n/a' if value is None else f'{value:.1f}'
+
+
+# Prints the change in every result between two runs from the results file
+def compareRuns(earlier=-2, later=-1):
+    with open(resultsPath) as resultsFile:
+        records = [json.loads(line) for line in resultsFile if line.strip()]
+    if len(records) < 2:
+        print('At least two runs are needed to compare')
+        return
+    first, second = (records[run - 1 if run > 0 else run] for run in (earlier, later))
+    print(f'{first["time"]} ({first["commit"]}) -> {second["time"]} ({second["commit"]})')
+    for name, results in second['scenarios'].items():
+        print(name)
+        before = first['scenarios'].get(name, {})
+        for key, value in results.items():
+            if before.get(key) is None or value is None:
+                continue
+            change = (value - before[key]) / before[key] if before[key] else 0
+            print(f'    {key:<18}{before[key]:10.2f} -> {value:10.2f}  {change:+7.1%}')
+
+
+def main():
+    if sys.argv[1:2] == ['--compare']:
+        compareRuns(*(int(run) for run in sys.argv[2:4]))
+        return
+    runSuite(int(sys.argv[1]) if len(sys.argv) > 1 else defaultTicks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,710 @@
+# ======================================================================================================================
+#
+# Headless simulation core for the platformer game.
+#
+# Holds everything that decides what happens in a level: the level's objects and their movement, player movement and
+# collisions, damage, coins and the finish flag. Nothing in here touches the display, the mixer or the keyboard, so
+# levels can be run without a window, eg. for testing levels or checking replays, many thousands of ticks a second.
+#
+# A tick is advanced with Simulation.step(), which takes the player's input for that tick as a bitmask of the flags
+# below. The game itself runs on the same classes: its World, Player and sprite classes extend the ones in here with
+# images, sounds and drawing.
+#
+# Usage:
+#     simulation = Simulation(Level(readLevel('platformer_assets/levels/level0_data.txt')))
+#     while simulation.step(RIGHT) == PLAYING:
+#         ...
+#
+# ======================================================================================================================
+
+import math
+import random
+from array import array
+
+import pygame
+from spatial import SpatialHash, TileGrid
+
+# Game ticks per second, every timer and speed in the game is counted in ticks
+FPS = 60
+tileSize = 50
+# Width of the view the camera follows the player with, and where the player is placed when a level is loaded
+viewWidth = 1000
+spawnX = 300
+spawnY = 400
+# Columns in each chunk of a level. Chunks are loaded within loadMargin pixels of the view, which has to cover
+# everything the player can touch plus how far a moving object goes from its tile, and unloaded past unloadMargin
+chunkColumns = 8
+loadMargin = 4 * tileSize
+unloadMargin = loadMargin + chunkColumns * tileSize
+
+# Input flags. LEFT, RIGHT, JUMP and SHORT_JUMP are held keys (space and shift for the jumps), the PRESSED flags are
+# set on the tick the key went down. Use withPresses() to add the PRESSED flags to a list of held inputs
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+SHORT_JUMP = 8
+JUMP_PRESSED = 16
+LEFT_PRESSED = 32
+RIGHT_PRESSED = 64
+
+# Game status, same values as the game's gamestate
+PLAYING = 1
+DEAD = -1
+WON = 2
+
+# Event flags, set in Simulation.events for the things that happened in the last tick
+JUMPED = 1
+DAMAGED = 2
+COIN = 4
+FINISHED = 8
+DIED = 16
+
+
+# Functions ------------------------------------------------------------------------------------------------------------
+
+# Attempts to convert a value to an integer, if it cannot be converted, returns 0
+def intCheck(value):
+    try:
+        value = int(value)
+    except ValueError or TypeError:
+        return 0
+    else:
+        return value
+
+
+# Reads a level file into a list of rows of tile numbers
+def readLevel(path):
+    data = []
+    with open(path, 'r') as lvlData:
+        for row in lvlData:
+            data.append([intCheck(block) for block in row.strip('\n').split(', ')])
+    return data
+
+
+# Adds the PRESSED flags to a list of held inputs, set on every tick a key is held that wasn't held the tick before
+def withPresses(inputs):
+    pressed = []
+    previous = 0
+    for held in inputs:
+        down = held & ~previous
+        if down & JUMP:
+            held |= JUMP_PRESSED
+        if down & LEFT:
+            held |= LEFT_PRESSED
+        if down & RIGHT:
+            held |= RIGHT_PRESSED
+        pressed.append(held)
+        previous = held
+    return pressed
+
+
+# Seeded random input for a number of ticks, mostly running right with jumps and gliding now and then. A new input is
+# held every 12 ticks
+def randomInputs(seed, ticks):
+    rng = random.Random(seed)
+    held = []
+    inputs = 0
+    for tick in range(ticks):
+        if tick % 12 == 0:
+            inputs = 0
+            if rng.random() < 0.6:
+                inputs |= RIGHT
+            elif rng.random() < 0.5:
+                inputs |= LEFT
+            if rng.random() < 0.4:
+                inputs |= JUMP
+        held.append(inputs)
+    return withPresses(held)
+
+
+# Time of impact of a rect moving by (moveX, moveY) with another rect, as a fraction of the tick, and the axis they meet
+# on: 0 for a side of the other rect and 1 for its top or bottom. Returns None if they don't meet within the tick. For
+# a moving rect, pass where it started the tick and the move relative to it. Rects that already overlap don't collide
+def sweep(rect, other, moveX, moveY):
+    if rect.colliderect(other):
+        return None
+    entryTimes = []
+    exitTimes = []
+    for start, end, otherStart, otherEnd, move in ((rect.left, rect.right, other.left, other.right, moveX),
+                                                   (rect.top, rect.bottom, other.top, other.bottom, moveY)):
+        if move > 0:
+            entryTimes.append((otherStart - end) / move)
+            exitTimes.append((otherEnd - start) / move)
+        elif move < 0:
+            entryTimes.append((otherEnd - start) / move)
+            exitTimes.append((otherStart - end) / move)
+        # Not moving on this axis, they only meet if they already overlap on it
+        elif end <= otherStart or start >= otherEnd:
+            return None
+        else:
+            entryTimes.append(-math.inf)
+            exitTimes.append(math.inf)
+    entry = max(entryTimes)
+    if not 0 <= entry < 1 or entry >= min(exitTimes):
+        return None
+    # The axis they overlap on last is the one they meet on, ties land on the top or bottom
+    return entry, 0 if entryTimes[0] > entryTimes[1] else 1
+
+
+# Offsets from where an object moving one pixel a tick starts, for each tick of its movement cycle. The object moves
+# forwards to reach pixels past its start, back to reach pixels before it and forwards to where it started, taking
+# 4 * reach ticks
+def backAndForth(reach):
+    offsets = array('h')
+    for tick in range(4 * reach):
+        if tick <= reach:
+            offsets.append(tick)
+        elif tick <= 3 * reach:
+            offsets.append(2 * reach - tick)
+        else:
+            offsets.append(tick - 4 * reach)
+    return offsets
+
+
+# Classes --------------------------------------------------------------------------------------------------------------
+
+# Object moving back and forth along one axis (0 horizontal, 1 vertical) on a cycle shared by every object of its
+# kind. Where a mover is only depends on how many ticks its level has run, so the level's tick count is the clock every
+# mover in it is read from: moving all of them by a tick is a single increment, and nothing is stored or updated for
+# each one. A mover that isn't in a level stays where it starts
+class Mover(pygame.sprite.Sprite):
+    # Offset along the axis from the starting position for each tick of the movement cycle
+    offsets = array('h', [0])
+    period = len(offsets)
+
+    def __init__(self, x, y, width, height, axis=0):
+        super().__init__()
+        self.startX = x
+        self.startY = y
+        self.width = width
+        self.height = height
+        self.axis = axis
+        # Level the mover moves with, set when it is added to one
+        self.level = None
+
+    # Top left position after the level has run a number of ticks
+    def positionAt(self, ticks):
+        offset = self.offsets[ticks % self.period]
+        if self.axis == 0:
+            return self.startX + offset, self.startY
+        return self.startX, self.startY + offset
+
+    @property
+    def rect(self):
+        ticks = self.level.ticks if self.level is not None else 0
+        return pygame.Rect(self.positionAt(ticks), (self.width, self.height))
+
+    # How far the mover moved in the level's latest tick, as (x, y)
+    def lastMove(self):
+        ticks = self.level.ticks if self.level is not None else 0
+        offset = self.offsets[ticks % self.period] - self.offsets[(ticks - 1) % self.period]
+        return (offset, 0) if self.axis == 0 else (0, offset)
+
+    # Area the mover covers over its whole movement cycle
+    def travelArea(self):
+        reach = (min(self.offsets), max(self.offsets) - min(self.offsets))
+        if self.axis == 0:
+            return pygame.Rect(self.startX + reach[0], self.startY, self.width + reach[1], self.height)
+        return pygame.Rect(self.startX, self.startY + reach[0], self.width, self.height + reach[1])
+
+
+# Block
+class Block(pygame.sprite.Sprite):
+    def __init__(self, x, y, tile):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, tileSize, tileSize)
+        self.tile = tile
+
+
+# Moving Block, only the top half of the block is solid. Moves one tile and a pixel either way along its axis
+class MovingBlock(Mover):
+    offsets = backAndForth(tileSize + 1)
+    period = len(offsets)
+
+    def __init__(self, x, y, axis):
+        super().__init__(x, y, tileSize, tileSize // 2, axis)
+
+
+# Spike Ball, moves one tile left and one tile right from its starting position
+class SpikeBall(Mover):
+    offsets = backAndForth(tileSize)
+    period = len(offsets)
+
+    def __init__(self, x, y):
+        super().__init__(x, y, tileSize, tileSize)
+
+
+# Spike, top facing (0) or bottom facing (1)
+class Spike(pygame.sprite.Sprite):
+    def __init__(self, x, y, direction):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, tileSize, tileSize // 2)
+        self.direction = direction
+
+
+# Coin
+class Coin(pygame.sprite.Sprite):
+    def __init__(self, x, y):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, tileSize, tileSize)
+
+
+# Finish flag
+class Finish(pygame.sprite.Sprite):
+    def __init__(self, x, y):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, tileSize, int(tileSize * 1.5))
+
+
+# Level, takes level data and creates the level's objects and the indexes used to find them. The object classes can be
+# replaced by subclasses, the game's World uses ones with images.
+#
+# The level is split into chunks of chunkColumns columns. With streaming on, only the chunks near the view have their
+# objects built, and chunks are loaded and unloaded as the camera moves, so a level of any length costs about the same
+# per tick and in memory. Moving objects and animations only depend on how many ticks the level has run, so an unloaded
+# chunk keeps nothing but which of its coins were collected: when it is loaded again its objects are caught up to the
+# level's tick. Collision and drawing order is kept the same as a level built all at once by ordering the spatial hash
+# by tile, row by row
+class Level:
+    Block = Block
+    MovingBlock = MovingBlock
+    SpikeBall = SpikeBall
+    Spike = Spike
+    Coin = Coin
+    Finish = Finish
+
+    def __init__(self, data, viewWidth=viewWidth, streaming=True):
+        self.data = data
+        self.viewWidth = viewWidth
+        self.streaming = streaming
+        # Camera position, the world x position of the left edge of the view
+        self.cameraPos = 0
+        # Width of the level up to the last column with a tile in it, and the furthest the camera can scroll
+        lastColumn = max((column for row in data for column, tile in enumerate(row) if tile != 0), default=0)
+        self.levelWidth = max((lastColumn + 1) * tileSize, viewWidth)
+        self.maxCamera = self.levelWidth - viewWidth
+        self.score = 0
+        # Level ticks run so far
+        self.ticks = 0
+        # Sprite groups, of the objects in loaded chunks
+        self.objects = pygame.sprite.Group()
+        self.balls = pygame.sprite.Group()
+        self.spikes = pygame.sprite.Group()
+        self.blocks = pygame.sprite.Group()
+        self.finishFlags = pygame.sprite.Group()
+        self.coins = pygame.sprite.Group()
+        self.damage = pygame.sprite.Group()
+        self.movingBlocks = pygame.sprite.Group()
+        # Collision indexes, stationary blocks are looked up by tile and every other object through a spatial hash.
+        # Moving objects are listed separately so the hash can be kept up to date as they move
+        self.columns = max((len(row) for row in data), default=0)
+        self.blockGrid = TileGrid(self.columns, len(data), tileSize)
+        self.index = SpatialHash(2 * tileSize)
+        # Objects of each loaded chunk in the order they were built, the range of chunks the view needs loaded, and
+        # the tiles of the objects removed from the level (the coins collected)
+        self.chunkCount = max(-(-self.columns // chunkColumns), 1)
+        self.chunks = {}
+        self.window = None
+        self.removed = set()
+        # Objects tested by collision checks, for profiling
+        self.collisionTests = 0
+        self.stream()
+
+    # Loads the chunks near the view and unloads the ones that have gone well out of it, or loads every chunk if
+    # streaming is off. Only does anything when the camera has moved into another chunk
+    def stream(self):
+        chunkWidth = chunkColumns * tileSize
+        if not self.streaming:
+            window = (0, self.chunkCount - 1)
+        else:
+            window = (max((self.cameraPos - loadMargin) // chunkWidth, 0),
+                      min((self.cameraPos + self.viewWidth + loadMargin - 1) // chunkWidth, self.chunkCount - 1))
+        if window == self.window:
+            return
+        self.window = window
+        if self.streaming:
+            # Chunks are kept a little further out than they are loaded, so walking back and forth over a chunk
+            # boundary doesn't keep loading and unloading the same chunk
+            keepFirst = (self.cameraPos - unloadMargin) // chunkWidth
+            keepLast = (self.cameraPos + self.viewWidth + unloadMargin - 1) // chunkWidth
+            for chunk in [chunk for chunk in self.chunks if not keepFirst <= chunk <= keepLast]:
+                self.unloadChunk(chunk)
+        for chunk in range(window[0], window[1] + 1):
+            if chunk not in self.chunks:
+                self.loadChunk(chunk)
+
+    # Builds the objects of a chunk, returns them
+    def loadChunk(self, chunk):
+        objects = []
+        firstColumn = chunk * chunkColumns
+        for row, rowData in enumerate(self.data):
+            for column, tile in enumerate(rowData[firstColumn:firstColumn + chunkColumns], firstColumn):
+                if tile != 0 and (column, row) not in self.removed:
+                    obj = self.addObject(tile, column, row)
+                    if obj is not None:
+                        objects.append(obj)
+        self.chunks[chunk] = objects
+        return objects
+
+    # Removes the objects of a chunk from the level, returns them
+    def unloadChunk(self, chunk):
+        objects = self.chunks.pop(chunk)
+        for obj in objects:
+            if obj in self.blocks:
+                self.blockGrid.remove(*obj.origin)
+            elif obj.alive():
+                self.index.remove(obj)
+            obj.kill()
+        return objects
+
+    # Creates the object for a tile and adds it to the level, returns it or None if the tile is empty
+    def addObject(self, tile, column, row):
+        x = column * tileSize
+        y = row * tileSize
+        # Dirt and assortment of grass blocks
+        if 1 <= tile <= 7:
+            obj = self.Block(x, y, tile)
+            obj.add(self.blocks, self.objects)
+            self.blockGrid.add(obj, column, row)
+        # Moving blocks, horizontal and vertical variants
+        elif tile == 8 or tile == 9:
+            obj = self.MovingBlock(x, y + 1, tile - 8)
+            obj.add(self.movingBlocks, self.objects)
+        # Spike balls
+        elif tile == 10:
+            obj = self.SpikeBall(x + 2, y + 13)
+            obj.add(self.balls, self.damage, self.objects)
+        # Spikes, top facing and bottom facing
+        elif tile == 11 or tile == 12:
+            obj = self.Spike(x + 2, y + tileSize // 2 if tile == 11 else y, tile - 11)
+            obj.add(self.spikes, self.damage, self.objects)
+        # Coin
+        elif tile == 13:
+            obj = self.Coin(x, y)
+            obj.add(self.coins, self.objects)
+        # Finish flag
+        elif tile == 14:
+            obj = self.Finish(x, y - tileSize // 2 + 5)
+            obj.add(self.finishFlags, self.objects)
+        else:
+            return None
+        obj.origin = (column, row)
+        # Objects that move or animate on their own do so with the level's ticks, movers are indexed under everywhere
+        # they move through so they never have to be moved in the index
+        if hasattr(obj, 'period'):
+            obj.level = self
+        if obj not in self.blocks:
+            self.index.add(obj, row * self.columns + column,
+                           obj.travelArea() if isinstance(obj, Mover) else None)
+        return obj
+
+    # Loads and unloads chunks for the view, then moves the level's moving objects by one tick, by counting the tick
+    def update(self):
+        self.stream()
+        self.ticks += 1
+
+    # Everything about the level that changes as it is played: the camera, score, ticks run and coins collected.
+    # Moving objects are wherever the tick count puts them, so restoring a snapshot only has to put collected coins back
+    def snapshot(self):
+        return self.cameraPos, self.score, self.ticks, frozenset(self.removed)
+
+    # Puts the level back to a snapshot of it
+    def restore(self, state):
+        self.cameraPos, self.score, self.ticks, removed = state
+        self.removed = set(removed)
+        for objects in self.chunks.values():
+            for obj in objects:
+                # Only coins are ever removed from a level
+                if obj.origin in self.removed and obj.alive():
+                    self.index.remove(obj)
+                    obj.kill()
+                elif obj.origin not in self.removed and not obj.alive():
+                    obj.add(self.coins, self.objects)
+                    self.index.add(obj, obj.origin[1] * self.columns + obj.origin[0])
+        self.window = None
+        self.stream()
+
+    # Area around a rect moving by (moveX, moveY) that collision checks need to look at. Collision responses can push
+    # the rect up to a tile plus its own height further than the move, so the swept rect is padded by that much
+    def sweptArea(self, rect, moveX, moveY):
+        return rect.union(rect.move(moveX, moveY)).inflate(2 * tileSize, 2 * (tileSize + rect.height))
+
+    # Stationary blocks in an area
+    def blocksNear(self, rect):
+        return self.blockGrid.query(rect)
+
+    # Moving blocks in an area
+    def movingBlocksNear(self, rect):
+        return [obj for obj in self.index.query(rect) if obj in self.movingBlocks]
+
+    # Same as pygame.sprite.spritecollide, but only tests objects from the spatial hash around the sprite
+    def spriteCollide(self, sprite, group, dokill=False):
+        nearby = self.index.query(sprite.rect)
+        self.collisionTests += len(nearby)
+        hits = [obj for obj in nearby if obj in group and sprite.rect.colliderect(obj.rect)]
+        if dokill:
+            for obj in hits:
+                obj.kill()
+                self.index.remove(obj)
+                self.removed.add(obj.origin)
+        return hits
+
+
+# Player, stores the player's position, movement and health. The player's pose is a (facingLeft, frame) pair naming
+# the animation frame the player is in: standing, two walking frames, jumping and falling
+class Player(pygame.sprite.Sprite):
+    def __init__(self, x, y):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, 45, 80)
+        self.width = self.rect.width
+        self.height = self.rect.height
+        self.health = 5
+        self.damageCD = 0
+        self.yVel = 0
+        self.onBlock = False
+        # Horizontal movement in the last tick
+        self.moveX = 0
+        self.walkCounter = 0
+        self.facingLeft = False
+        self.pose = (False, 0)
+        # Wings open animation, and the wing frame (5 opening, 6 open) shown this tick, None if the wings are closed
+        self.wingCounter = 0
+        self.wingFrame = None
+
+    # Moves the player to the start of a new level, as they were when they were created. Nothing carries over from the
+    # last level, so every attempt starts the same way and a recording of it replays the same
+    def respawn(self, x, y):
+        self.rect.topleft = (x, y)
+        self.health = 5
+        self.damageCD = 0
+        self.yVel = 0
+        self.onBlock = False
+        self.moveX = 0
+        self.walkCounter = 0
+        self.facingLeft = False
+        self.pose = (False, 0)
+        self.wingCounter = 0
+        self.wingFrame = None
+
+    # Position, movement, health and animation of the player, for putting them back with restore()
+    def snapshot(self):
+        return (self.rect.topleft, self.health, self.damageCD, self.yVel, self.onBlock, self.moveX, self.walkCounter,
+                self.facingLeft, self.pose, self.wingCounter, self.wingFrame)
+
+    def restore(self, state):
+        (self.rect.topleft, self.health, self.damageCD, self.yVel, self.onBlock, self.moveX, self.walkCounter,
+         self.facingLeft, self.pose, self.wingCounter, self.wingFrame) = state
+
+    # Takes damage if damage-taking is not on cooldown, returns True if damage was taken
+    def takeDamage(self):
+        if self.damageCD == 0:
+            self.health -= 1
+            self.damageCD = 1
+            return True
+        return False
+
+    # Tracks damage cooldown for player
+    def update(self):
+        if self.damageCD != 0:
+            self.damageCD += 1
+            if self.damageCD >= FPS:
+                self.damageCD = 0
+
+
+# Simulation, runs a player through a level one tick at a time. wings allows gliding while jump is held, fly allows
+# flying up while jump is held, and cheats stops the player from taking damage
+class Simulation:
+    def __init__(self, level, player=None, cheats=False, wings=True, fly=False):
+        self.level = level
+        self.player = player if player is not None else Player(spawnX, spawnY)
+        self.cheats = cheats
+        self.wings = wings
+        self.fly = fly
+        self.status = PLAYING
+        self.events = 0
+        self.ticks = 0
+        # Frame profile the phases of each tick are timed with, if any
+        self.profile = None
+
+    # Runs one tick and the player's damage cooldown, returns the status of the game after the tick
+    def step(self, inputs):
+        self.update(inputs)
+        self.player.update()
+        return self.status
+
+    # Steps through a list of inputs until the level is won or lost, returns the status and the number of ticks run
+    def run(self, inputs):
+        ticks = 0
+        for tickInputs in inputs:
+            ticks += 1
+            if self.step(tickInputs) != PLAYING:
+                break
+        return self.status, ticks
+
+    # Position, movement, health, score and status after the last tick
+    def state(self):
+        player = self.player
+        return player.rect.x, player.rect.y, player.yVel, player.health, self.level.score, self.status
+
+    # Runs one tick without the damage cooldown. While paused, only key presses are taken and nothing moves
+    def update(self, inputs, paused=False):
+        player = self.player
+        self.events = 0
+        player.wingFrame = None
+        self.ticks += 1
+        if self.status != PLAYING:
+            player.onBlock = False
+            return
+        # Key presses are taken before onBlock is reset, so the player can jump if they were on a block last tick
+        if inputs & JUMP_PRESSED and player.onBlock:
+            self.events |= JUMPED
+            # Jumps slightly lower when holding shift
+            player.yVel = -16 if inputs & SHORT_JUMP else -21
+        # Makes it so that the player's pose changes as soon as a direction key is pressed
+        if inputs & (LEFT_PRESSED | RIGHT_PRESSED):
+            player.facingLeft = bool(inputs & LEFT_PRESSED)
+            player.pose = (player.facingLeft, 1)
+        player.onBlock = False
+        if not paused:
+            self.tick(inputs)
+
+    # Moves everything in the level and the player by one tick
+    def tick(self, inputs):
+        level = self.level
+        player = self.player
+        rect = player.rect
+        profile = self.profile
+        if profile is not None:
+            profile.phase('objects')
+        level.update()
+        if profile is not None:
+            profile.phase('collisions')
+        # Player and mob collisions, coin collisions, and finish line collision
+        if level.spriteCollide(player, level.damage) and not self.cheats:
+            if player.takeDamage():
+                self.events |= DAMAGED
+        if level.spriteCollide(player, level.coins, True):
+            level.score += 1
+            self.events |= COIN
+        if level.spriteCollide(player, level.finishFlags):
+            self.status = WON
+            self.events |= FINISHED
+
+        # Player movement
+        moveX = 0
+        if inputs & LEFT:
+            moveX -= 5
+            player.walkCounter += 1
+            player.facingLeft = True
+        if inputs & RIGHT:
+            moveX += 5
+            player.walkCounter += 1
+            player.facingLeft = False
+        facingLeft = player.facingLeft
+        # If player is not moving, changes player pose to standing
+        if moveX == 0:
+            player.pose = (facingLeft, 0)
+        # Player movement animation
+        elif player.walkCounter >= FPS / 6:
+            player.walkCounter = 0
+            player.pose = (facingLeft, 1) if player.pose != (facingLeft, 1) else (facingLeft, 2)
+
+        # Gravity and falling
+        # Fly mechanic, not really implemented. Only really used for testing at the moment
+        if self.fly and inputs & JUMP:
+            if player.yVel > -10:
+                player.yVel -= 2
+            else:
+                player.yVel = -10
+        # Gliding if wings are enabled
+        elif self.wings and inputs & JUMP:
+            if player.yVel < 0:
+                player.yVel += 1
+            else:
+                # Wing open animation
+                if player.wingCounter < FPS // 10:
+                    player.wingCounter += 1
+                    player.wingFrame = 5
+                else:
+                    player.wingFrame = 6
+                # Gliding fall speed
+                player.yVel = 3
+        else:
+            # Wing close animation
+            if self.wings and player.wingCounter > 0:
+                player.wingCounter -= 1
+                player.wingFrame = 5
+            if player.yVel < 10:
+                player.yVel += 1
+            else:
+                player.yVel = 10
+        moveY = player.yVel
+
+        # Player collision checks, only objects around the area the player can move through are checked
+        # Moving blocks collision, swept from where each block started the tick so a block and the player can't pass
+        # through each other between ticks. A block the player is already inside is passed through, which keeps the
+        # player from getting stuck when squished between a moving block and a stationary one
+        movingBlocks = level.movingBlocksNear(level.sweptArea(rect, moveX, moveY))
+        level.collisionTests += len(movingBlocks)
+        for movingBlock in movingBlocks:
+            blockRect = movingBlock.rect
+            blockMoveX, blockMoveY = movingBlock.lastMove()
+            hit = sweep(rect, blockRect.move(-blockMoveX, -blockMoveY), moveX - blockMoveX, moveY - blockMoveY)
+            if hit is None:
+                continue
+            # Sides of the block, the player stops against where the block has moved to
+            if hit[1] == 0:
+                if moveX > blockMoveX:
+                    moveX = blockRect.left - rect.right
+                else:
+                    moveX = blockRect.right - rect.left
+            # Bottom of the block
+            elif moveY < blockMoveY:
+                player.yVel = 0
+                moveY = blockRect.bottom - rect.top
+            # Top of the block, the player is carried along with it
+            else:
+                moveY = blockRect.top - rect.bottom - 1
+                moveX += blockMoveX
+                player.onBlock = True
+
+        # Collisions for stationary blocks
+        blocks = level.blocksNear(level.sweptArea(rect, moveX, moveY))
+        level.collisionTests += len(blocks)
+        for block in blocks:
+            # Horizontal collision
+            if block.rect.colliderect(rect.x + moveX, rect.y, player.width, player.height):
+                moveX = 0
+            # Vertical collision
+            elif block.rect.colliderect(rect.x, rect.y + moveY, player.width, player.height):
+                # Calculates collision and movement if player is moving up
+                if player.yVel < 0:
+                    moveY = block.rect.bottom - rect.top
+                    player.yVel = 0
+                # Calculates collision and movement if player is moving down
+                else:
+                    moveY = block.rect.top - rect.bottom
+                    player.onBlock = True
+        # Changes player pose for falling and jumping
+        if player.yVel <= 0:
+            player.pose = (facingLeft, 3)
+        elif not player.onBlock:
+            player.pose = (facingLeft, 4)
+
+        # Camera movement, keeps player on center left of the view unless the level is at its edges
+        if profile is not None:
+            profile.phase('camera')
+        playerViewX = rect.x - level.cameraPos
+        if 0 <= level.cameraPos + moveX <= level.maxCamera:
+            # If the player is not at center left, allows player to move there first before locking camera
+            if (moveX < 0 and playerViewX + moveX <= 375) or (moveX > 0 and playerViewX + moveX >= 375):
+                level.cameraPos += moveX
+        player.moveX = moveX
+        rect.x += moveX
+        rect.y += moveY
+
+        # If player has no more health, kills player
+        if player.health <= 0:
+            self.status = DEAD
+            self.events |= DIED
+
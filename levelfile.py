@@ -0,0 +1,191 @@
+# ======================================================================================================================
+#
+# Binary level files and level packs, compact forms of the text level files that load without any parsing.
+#
+# A binary level is a small header followed by one byte per tile, row by row:
+#     4 bytes   magic, b'PLVL'
+#     2 bytes   format version
+#     2 bytes   columns
+#     2 bytes   rows
+#     rows * columns bytes   tile numbers, shorter text rows are padded with empty tiles
+# Numbers in the header are little endian.
+#
+# A level pack holds many levels in one file, a table of contents followed by each level's tiles:
+#     4 bytes   magic, b'PLVP'
+#     2 bytes   format version
+#     2 bytes   number of levels
+#     then for each level, 40 bytes:
+#         32 bytes  name, UTF-8 padded with zero bytes
+#         4 bytes   offset of the level's tiles from the start of the file
+#         2 bytes   columns
+#         2 bytes   rows
+#     then the tiles of each level, one byte per tile as in a level file
+# Opening a pack only reads the table of contents, so menus can list the levels without loading any of them.
+#
+# Loading memory-maps the file, the tiles are read straight out of the mapping through memoryviews, so nothing is
+# copied or converted until the level is built. LevelData works anywhere a list of rows from engine.readLevel does.
+#
+# Convert text levels from the game folder with:
+#     python -m levelfile [text level files]
+#     python -m levelfile --pack [pack file] [text level files]
+# With no files given, the preloaded levels are converted. Each level is written next to its text file with a .lvl
+# extension. Packs default to the game's pack, with the levels named 'Level 1', 'Level 2' and so on in the order given.
+#
+# ======================================================================================================================
+
+import mmap
+import os
+import struct
+import sys
+
+from engine import readLevel
+
+magic = b'PLVL'
+version = 1
+header = struct.Struct('<4sHHH')
+extension = '.lvl'
+packMagic = b'PLVP'
+packHeader = struct.Struct('<4sHH')
+packEntry = struct.Struct('<32sIHH')
+gamePack = 'platformer_assets/levels/levels.lvp'
+
+
+# Classes --------------------------------------------------------------------------------------------------------------
+
+# Tiles of a level as rows of tile numbers, tiles is any buffer of rows * columns bytes. Rows are zero-copy views of it
+class LevelData:
+    def __init__(self, columns, rows, tiles):
+        self.columns = columns
+        self.rows = rows
+        self.tiles = memoryview(tiles).cast('B')
+        if len(self.tiles) != columns * rows:
+            raise ValueError(f'Expected {columns * rows} tiles, got {len(self.tiles)}')
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError('level row out of range')
+        start = row * self.columns
+        return self.tiles[start:start + self.columns]
+
+    def __iter__(self):
+        columns = self.columns
+        return (self.tiles[start:start + columns] for start in range(0, self.rows * columns, columns))
+
+    # Memory maps can't be pickled, eg. when sent to a worker process, so the tiles are copied instead
+    def __reduce__(self):
+        return LevelData, (self.columns, self.rows, bytes(self.tiles))
+
+
+# Level pack file, reads the table of contents when opened and each level's tiles when they are asked for
+class LevelPack:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as packFile:
+            if os.fstat(packFile.fileno()).st_size < packHeader.size:
+                raise ValueError(f'{path} is not a level pack')
+            self.mapped = mmap.mmap(packFile.fileno(), 0, access=mmap.ACCESS_READ)
+        fileMagic, fileVersion, count = packHeader.unpack_from(self.mapped)
+        if fileMagic != packMagic or fileVersion != version:
+            raise ValueError(f'{path} is not a version {version} level pack')
+        # (offset, columns, rows) of each level's tiles
+        self.names = []
+        self.entries = []
+        for level in range(count):
+            name, offset, columns, rows = packEntry.unpack_from(self.mapped, packHeader.size + level * packEntry.size)
+            self.names.append(name.rstrip(b'\0').decode('utf-8'))
+            self.entries.append((offset, columns, rows))
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Tiles of a level, a view of the pack file that is only read from disk as the level is built
+    def level(self, index):
+        offset, columns, rows = self.entries[index]
+        return LevelData(columns, rows, memoryview(self.mapped)[offset:offset + columns * rows])
+
+
+# Functions ------------------------------------------------------------------------------------------------------------
+
+# Packs a list of rows of tile numbers into the binary format
+def packLevel(data):
+    columns = max((len(row) for row in data), default=0)
+    tiles = bytearray(columns * len(data))
+    for row, rowData in enumerate(data):
+        if any(not 0 <= tile <= 255 for tile in rowData):
+            raise ValueError(f'Tile numbers must be 0 to 255, row {row} has {max(rowData)}')
+        tiles[row * columns:row * columns + len(rowData)] = bytes(rowData)
+    return header.pack(magic, version, columns, len(data)) + tiles
+
+
+# Memory-maps a binary level file
+def readBinaryLevel(path):
+    with open(path, 'rb') as lvlFile:
+        if os.fstat(lvlFile.fileno()).st_size < header.size:
+            raise ValueError(f'{path} is not a level file')
+        mapped = mmap.mmap(lvlFile.fileno(), 0, access=mmap.ACCESS_READ)
+    fileMagic, fileVersion, columns, rows = header.unpack_from(mapped)
+    if fileMagic != magic or fileVersion != version:
+        raise ValueError(f'{path} is not a version {version} level file')
+    return LevelData(columns, rows, memoryview(mapped)[header.size:header.size + columns * rows])
+
+
+# Packs named levels, a list of (name, list of rows of tile numbers) pairs, into a level pack
+def packLevels(levels):
+    tableSize = packHeader.size + len(levels) * packEntry.size
+    table = [packHeader.pack(packMagic, version, len(levels))]
+    blobs = []
+    offset = tableSize
+    for name, data in levels:
+        encoded = name.encode('utf-8')
+        if len(encoded) > 32:
+            raise ValueError(f'Level name {name!r} is longer than 32 bytes')
+        # The level file header is dropped, its size is in the table of contents instead
+        blob = packLevel(data)[header.size:]
+        columns = max((len(row) for row in data), default=0)
+        table.append(packEntry.pack(encoded, offset, columns, len(data)))
+        blobs.append(blob)
+        offset += len(blob)
+    return b''.join(table + blobs)
+
+
+# Reads a level file of either format, chosen by its extension
+def loadLevel(path):
+    if path.endswith(extension):
+        return readBinaryLevel(path)
+    return readLevel(path)
+
+
+# Writes a text level file as a binary level file, returns the path written
+def convertLevel(path):
+    binaryPath = os.path.splitext(path)[0] + extension
+    with open(binaryPath, 'wb') as lvlFile:
+        lvlFile.write(packLevel(readLevel(path)))
+    return binaryPath
+
+
+# Writes text level files into a level pack
+def convertPack(paths, packPath):
+    with open(packPath, 'wb') as packFile:
+        packFile.write(packLevels([(f'Level {level + 1}', readLevel(path)) for level, path in enumerate(paths)]))
+
+
+def main():
+    arguments = sys.argv[1:]
+    pack = arguments[:1] == ['--pack']
+    if pack:
+        arguments = arguments[1:]
+        packPath = arguments.pop(0) if arguments and arguments[0].endswith('.lvp') else gamePack
+    paths = arguments or [f'platformer_assets/levels/level{level}_data.txt' for level in range(4)]
+    if pack:
+        convertPack(paths, packPath)
+        print(f'{len(paths)} levels -> {packPath}')
+        return
+    for path in paths:
+        print(f'{path} -> {convertLevel(path)}')
+
+
+if __name__ == '__main__':
+    main()
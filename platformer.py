@@ -35,22 +35,36 @@
 #
 # Known Bugs
 #
-# - Sometimes player is able to phase through bottom of vertically moving blocks, doesn't really affect gameplay and
-# is not very noticeable, also very difficult to reproduce as of current testing, seems to be caused by some timing
-# mismatch with the block movement and horizontal collision where the player triggers horizontal collision and skips
-# vertical collision check? Upon further testing, this seems to be triggered when the player switches from freefalling
-# to gliding just before contacting the top of a vertically moving block. Still not really sure why, but seems to be an
-# issue with the initial colliderect collision check failing to activate.
+# - Fixed: the player used to phase through vertically moving blocks now and then, mostly when switching from
+# freefalling to gliding just before landing on one. Moving blocks were checked against where they had already moved
+# to, so a block moving up into the player in the same tick was taken as a horizontal collision and the vertical check
+# was skipped. Moving block collisions are now swept from where the block and the player start each tick.
 #
 # ======================================================================================================================
 
 
-# Import necessary modules and initialization
+# Import necessary modules and initialization, timing every step until the first frame is drawn
+from profiler import StartupProfile, FrameProfile, BenchmarkRun, peakMemory
+startupProfile = StartupProfile()
 import pygame
 import sys
+import io
+import json
 import random
-
+import collections
+import os
+import time
+from assets import AssetManager, LazySound, Loader, readFile, remap, remapValue
+from render import (FrameRenderer, Layer, TileLayer, RenderQueue, TextCache, GlyphStrip, BACKGROUND, TILES, OBJECTS,
+                    WINGS, PLAYER)
+import engine
+import levelfile
+import replayfile
+from engine import FPS, tileSize, chunkColumns
+
+startupProfile.mark('imports')
 pygame.init()
+startupProfile.mark('pygame init')
 
 # File check: Ensures all files needed to run are accessible, if the files cannot be found, alerts the user as to which
 # files are missing
@@ -74,43 +88,177 @@ if len(missingFileList) > 0:
         f"The game could not be initialized.\nFiles missing:\n    {missingFiles}\nPlease make sure the missing files "
         f"are placed within their respective folders in the 'platformer_assets' folder inside the game directory.")
     sys.exit()
+startupProfile.mark('file check')
 
 
 # Functions ------------------------------------------------------------------------------------------------------------
 
-# Attempts to convert a value to an integer, if it cannot be converted, returns 0
-def intCheck(value):
-    try:
-        value = int(value)
-    except ValueError or TypeError:
-        return 0
-    else:
-        return value
+# Displays FPS, drawn from pre-rendered glyphs
+def displayFPS(surface, location, glyphs):
+    glyphs.draw(surface, f"FPS: {int(clock.get_fps())}", location)
 
 
-# Displays FPS
-def displayFPS(surface, location, font, color, FPScap):
-    fps = font.render(f"FPS: {int(clock.get_fps())}", False, color)
-    surface.blit(fps, location)
-    pygame.display.update()
-    clock.tick(FPScap)
+# Draws everything that goes directly onto the screen under the mob and menu layers: the background, the level and
+# debugging lines. When only part of the screen is being redrawn, the screen's clip is set to that part
+def drawScene():
+    renderer.countBlits(renderQueue.draw(screen))
+    # Draws a grid for debugging, and draws player hitbox
+    if debug and gamestate == 1:
+        drawGrid(world.drawCamera)
+        pygame.draw.rect(screen, (255, 255, 255), world.toScreen(player.rect), 2)
 
 
 # Import levels --------------------------------------------------------------------------------------------------------
-maxLvls = 4
-levels = []
-
-for level in range(maxLvls):
-    data = [[], 0]
-    lvlData = open(f'platformer_assets//levels/level{level}_data.txt', 'r').readlines()
-    for row in lvlData:
-        rowData = []
-        row = row.strip('\n').split(', ')
-        for block in row:
-            rowData.append(intCheck(block))
-        data[0].append(rowData)
-    levels.append(data)
-levels[0][1] = 1
+# Only the pack's table of contents is read here, each level's tiles are read when the level is played
+levelPack = levelfile.LevelPack(levelfile.gamePack)
+maxLvls = len(levelPack)
+unlocked = [False] * maxLvls
+unlocked[0] = True
+# Recently played worlds by level number and snapshots of them as they were built, least recently played first. The
+# custom level is number maxLvls
+worldCache = collections.OrderedDict()
+worldCacheSize = 4
+# Level file played as the custom level, text or binary
+customLevelPath = 'platformer_assets/levels/customlevel.txt'
+
+
+# Starts loading the world for a level, returns the job loading it. A level played recently is put back to its start
+# straight away, otherwise its world is built on the loader thread. The job's result is the world and its start snapshot
+def loadWorld(level):
+    cached = worldCache.pop(level, None)
+    if cached is None:
+        return loader.submit(buildWorld, level)
+    return loader.run(restoreWorld, *cached)
+
+
+# Builds a level's world, run on the loader thread. The custom level's file is read here too
+def buildWorld(level):
+    if level == maxLvls:
+        world = World(levelfile.loadLevel(customLevelPath))
+    else:
+        world = World(levelPack.level(level))
+    return world, world.snapshot()
+
+
+def restoreWorld(world, start):
+    world.restore(start)
+    return world, start
+
+
+# Starts an attempt at the current level from where the world and player are. The random generator is seeded for the
+# attempt and the seed recorded, so a replay of the attempt picks the same music
+def startAttempt():
+    global simulation, recording
+    simulation = engine.Simulation(world, player, cheats, wings, fly)
+    simulation.profile = frameProfile
+    seed = replay.seed if replay is not None else random.getrandbits(32)
+    random.seed(seed)
+    recording = replayfile.Recording(currentLevel, replayfile.levelChecksum(world.data), seed, cheats, wings, fly)
+    if replay is not None and recording.checksum != replay.checksum:
+        print('Warning: the level has changed since the recording was made, the replay may not match',
+              file=sys.stderr)
+
+
+# Saves the recording of the current attempt so far to recordingFolder, with the state it has got to
+def saveRecording():
+    recording.result = simulation.state()
+    levelName = 'custom' if recording.level == maxLvls else f'level{recording.level + 1}'
+    path = os.path.join(recordingFolder, f'{levelName}-{time.strftime("%Y%m%d-%H%M%S")}-{len(recording)}'
+                                         f'{replayfile.extension}')
+    os.makedirs(recordingFolder, exist_ok=True)
+    recording.save(path)
+    print(f'Recording saved to {path}')
+
+
+# Draws the loading screen shown while a level is being built
+def drawLoadingScreen():
+    menuLayer.mark(pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(275, 350, 450, 200), 0, 50))
+    menuLayer.blit(renderLabel('Loading...', buttonFont), (width // 2 - 110, 375))
+    # Progress bar, filled by the share of the loader's jobs that have finished
+    bar = pygame.Rect(325, 475, 350, 25)
+    menuLayer.mark(pygame.draw.rect(menuLayer, (255, 255, 255), bar, 2))
+    menuLayer.mark(pygame.draw.rect(menuLayer, (255, 255, 255),
+                                    (bar.x + 4, bar.y + 4, (bar.width - 8) * loader.progress(), bar.height - 8)))
+
+
+# Draws a frame. Frames are drawn independently of the game ticks, alpha is how far the frame is between the previous
+# tick and the latest one, positions of moving objects are interpolated by it so movement looks smooth at any frame rate
+def drawFrame(alpha):
+    frameProfile.phase('level drawing')
+    renderer.beginFrame(mobLayer, overlayLayer)
+    renderQueue.clear()
+    # Sets background for menu and game level
+    if gamestate != 0 and gamestate != 0.2 and gamestate != 0.1:
+        renderQueue.add(BACKGROUND, backgroundImg, (0, 0))
+    else:
+        renderQueue.add(BACKGROUND, menuImg, (0, 0))
+    if gamestate == 1 or gamestate == -1 or gamestate == 2:
+        world.setView(alpha)
+        world.queueDraw()
+        # Wing animation
+        if wingFrame is not None:
+            wingImage, wingWidth = player.imageList()[wingFrame]
+            wingX = world.drawPos(player)[0] + player.width // 2 - wingWidth // 2
+            renderer.mark(renderQueue.add(WINGS, wingImage, (wingX, world.drawPos(player)[1] + 10)))
+        player.draw()
+    # Displays FPS counter if the option is toggled on
+    if fpsCounter:
+        displayFPS(overlayLayer, (0, 0), fpsGlyphs)
+    if profileOverlay:
+        drawProfile(overlayLayer)
+    # Draws the screen and layers, the whole screen is redrawn whenever the game state or camera changes
+    renderer.endFrame(drawScene, (gamestate, pause, world.drawCamera if world is not None else None))
+
+
+# Draws the frame profile overlay: percentiles, the average time of each phase and a graph of the latest frame times.
+# The text is only rendered again every few frames, through the text cache, so the overlay takes little of the frame
+# time it measures and its renders are counted with the rest
+def drawProfile(surface):
+    global profileText
+    if frameProfile.frames % 15 == 0 or not profileText:
+        profileText = [textCache.render(font, line, (255, 255, 255)) for line in frameProfile.summary()]
+    panel = pygame.Rect(10, 70, 320, 20 + 18 * len(profileText) + profileGraphHeight)
+    surface.fill((0, 0, 0, 160), panel)
+    surface.mark(panel)
+    surface.blits([(text, (panel.x + 10, panel.y + 10 + 18 * line)) for line, text in enumerate(profileText)], False)
+    # Frame times, scaled so the top of the graph is three frames at 60 FPS, with a line at one frame
+    graphBottom = panel.bottom - 10
+    scale = profileGraphHeight / (3000 / FPS)
+    pygame.draw.line(surface, (255, 204, 0), (panel.x + 10, graphBottom - 1000 / FPS * scale),
+                     (panel.right - 10, graphBottom - 1000 / FPS * scale))
+    points = [(panel.x + 10 + index, graphBottom - min(frame[0] * scale, profileGraphHeight))
+              for index, frame in enumerate(frameProfile.history)]
+    if len(points) > 1:
+        pygame.draw.lines(surface, (255, 255, 255), False, points)
+
+
+# Converts loaded images again if the display's pixel format has changed, eg. when the window is moved to another
+# monitor, and swaps the converted images into every object holding them
+def checkDisplayFormat():
+    global menuImg, backgroundImg
+    # A world being built could pick up images from before or after the conversion, so it is finished first
+    loader.wait()
+    replaced = assets.checkDisplayFormat()
+    if not replaced:
+        return
+    finishStartup()
+    menuImg = replaced.get(menuImg, menuImg)
+    backgroundImg = replaced.get(backgroundImg, backgroundImg)
+    remapValue(coinImages, replaced)
+    holders = [player, soundToggle, musicToggle, fpsToggle, partialRedrawToggle, *buttons]
+    worlds = [world] if world is not None else []
+    # A world that has been built but not played yet
+    if levelJob is not None and levelJob.error is None:
+        worlds.append(levelJob.value[0])
+    for loadedWorld in worlds:
+        holders += [loadedWorld, *loadedWorld.objects]
+    for holder in holders:
+        remap(holder, replaced)
+    for loadedWorld in worlds:
+        loadedWorld.tileLayer.bake()
+    # Cached worlds that aren't being played still hold the old images, they are built again if they are played
+    for level in [level for level, (cachedWorld, start) in worldCache.items() if cachedWorld is not world]:
+        del worldCache[level]
 
 
 # Debugging functions --------------------------------------------------------------------------------------------------
@@ -119,197 +267,73 @@ levels[0][1] = 1
 def drawGrid(pos):
     for line in range(1, tileCount + 1):
         pygame.draw.line(screen, (255, 255, 255), (0, line * tileSize), (width, line * tileSize))
-    for line in range(0, tileCount * 4 + 1):
+    for line in range(pos // tileSize, (pos + width) // tileSize + 1):
         pygame.draw.line(screen, (255, 255, 255), (line * tileSize - pos, 0),
                          (line * tileSize - pos, height))
 
 
-# Classes --------------------------------------------------------------------------------------------------------------
+# Renders the text of a button or label in white, texts drawn again are taken from the text cache
+def renderLabel(text, font):
+    return textCache.render(font, text, (255, 255, 255))
 
-# World class, takes world data and creates a list of the blocks and locations
-class World:
-    def __init__(self, data):
-        self.blockList = []
-        # Tracks current camera location compared to blocks
-        self.cameraPos = 0
-        # Score tracker and coin image
-        self.score = 0
-        self.scoreImage = pygame.transform.scale(pygame.image.load('platformer_assets/img/coin1.png'), (45, 45))
-        # Sprite groups
-        self.objects = pygame.sprite.Group()
-        self.balls = pygame.sprite.Group()
-        self.spikes = pygame.sprite.Group()
-        self.blocks = pygame.sprite.Group()
-        self.finishFlags = pygame.sprite.Group()
-        self.coins = pygame.sprite.Group()
-        self.damage = pygame.sprite.Group()
-        self.movingBlocks = pygame.sprite.Group()
-        # Reads list provided by data and converts it into locations for block placement
-        currentRow = 0
-        for row in data:
-            column = 0
-            for tile in row:
-                # Dirt block
-                if tile == 1:
-                    self.image = pygame.image.load('platformer_assets/img/dirt.png')
-                    block = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(block)
-                    self.objects.add(block)
-                # Assortment of grass blocks
-                elif tile == 2:
-                    self.image = pygame.image.load('platformer_assets/img/grass_left.png')
-                    grassblock = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(grassblock)
-                    self.objects.add(grassblock)
-                elif tile == 3:
-                    self.image = pygame.image.load('platformer_assets/img/grass_center.png')
-                    grassblock = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(grassblock)
-                    self.objects.add(grassblock)
-                elif tile == 4:
-                    self.image = pygame.image.load('platformer_assets/img/grass_right.png')
-                    grassblock = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(grassblock)
-                    self.objects.add(grassblock)
-                elif tile == 5:
-                    self.image = pygame.image.load('platformer_assets/img/grass_plat_left.png')
-                    grassblock = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(grassblock)
-                    self.objects.add(grassblock)
-                elif tile == 6:
-                    self.image = pygame.image.load('platformer_assets/img/grass_plat_center.png')
-                    grassblock = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(grassblock)
-                    self.objects.add(grassblock)
-                elif tile == 7:
-                    self.image = pygame.image.load('platformer_assets/img/grass_plat_right.png')
-                    grassblock = Block(column * tileSize - self.cameraPos, currentRow * tileSize, self.image)
-                    self.blocks.add(grassblock)
-                    self.objects.add(grassblock)
-                # Moving blocks, vertical and horizontal variants
-                elif tile == 8:
-                    movingBlock = MovingBlock(column * tileSize - self.cameraPos, currentRow * tileSize + 1, 0)
-                    self.movingBlocks.add(movingBlock)
-                    self.objects.add(movingBlock)
-                elif tile == 9:
-                    movingBlock = MovingBlock(column * tileSize - self.cameraPos, currentRow * tileSize + 1, 1)
-                    self.movingBlocks.add(movingBlock)
-                    self.objects.add(movingBlock)
-                # Spike balls
-                elif tile == 10:
-                    ball = SpikeBall(column * tileSize + 2 - self.cameraPos, currentRow * tileSize + 13)
-                    self.balls.add(ball)
-                    self.damage.add(ball)
-                    self.objects.add(ball)
-                # Spikes, top facing and bottom facing
-                elif tile == 11:
-                    spikeTop = Spike(column * tileSize + 2 - self.cameraPos, currentRow * tileSize + tileSize / 2, 0)
-                    self.spikes.add(spikeTop)
-                    self.damage.add(spikeTop)
-                    self.objects.add(spikeTop)
-                elif tile == 12:
-                    spikeBottom = Spike(column * tileSize + 2 - self.cameraPos, currentRow * tileSize, 1)
-                    self.spikes.add(spikeBottom)
-                    self.damage.add(spikeBottom)
-                    self.objects.add(spikeBottom)
-                # Coin
-                elif tile == 13:
-                    coin = Coin(column * tileSize - self.cameraPos, currentRow * tileSize)
-                    self.coins.add(coin)
-                    self.objects.add(coin)
-                # Finish flag
-                elif tile == 14:
-                    finishFlag = Finish(column * tileSize - self.cameraPos,
-                                        currentRow * tileSize - tileSize // 2 + 5)
-                    self.finishFlags.add(finishFlag)
-                    self.objects.add(finishFlag)
-                column += 1
-            currentRow += 1
-
-    # Draws level onto screen
-    def drawLvl(self):
-        world.objects.draw(screen)
-        world.balls.draw(mobLayer)
-        world.coins.draw(mobLayer)
-        menuLayer.blit(self.scoreImage, (5, 10))
-        menuLayer.blit(smallFont.render(f'x {self.score}', True, (255, 204, 0)), (60, 20))
-        # Draws rect / hitbox of each object if in debug mode
-        if debug:
-            for obj in world.objects:
-                pygame.draw.rect(mobLayer, (255, 255, 255), obj.rect, 2)
 
+# Classes --------------------------------------------------------------------------------------------------------------
 
 # Spike Ball
-class SpikeBall(pygame.sprite.Sprite):
+class SpikeBall(engine.SpikeBall):
     def __init__(self, x, y):
-        super().__init__()
-        self.images = []
-        for img in range(1, 3):
-            img = pygame.image.load(f'platformer_assets/img/spikeBall{img}.png')
-            img = pygame.transform.scale(img, (tileSize, tileSize))
-            self.images.append(img)
-        self.image = self.images[0]
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.direction = 1
-        self.counter = 0
-        self.width = self.image.get_rect().width
-        self.height = self.image.get_rect().height
+        super().__init__(x, y)
+        self.images = [tileAtlas['spikeBall1'], tileAtlas['spikeBall2']]
 
-    # Moves one block left and one block right from starting position
-    def update(self):
-        self.rect.x += self.direction
-        self.counter += 1
-        if self.counter == 50:
-            self.direction *= -1
-            self.counter *= -1
-        if self.counter % 10 == 0:
-            if self.image == self.images[0]:
-                self.image = self.images[1]
-            else:
-                self.image = self.images[0]
+    # Image of the ball, swaps every 10 ticks
+    @property
+    def image(self):
+        ticks = self.level.ticks if self.level is not None else 0
+        return self.images[ticks // 10 % 2]
 
 
 # Spike
-class Spike(pygame.sprite.Sprite):
+class Spike(engine.Spike):
     def __init__(self, x, y, direction):
-        super().__init__()
-        self.image = pygame.image.load('platformer_assets/img/spike.png')
+        super().__init__(x, y, direction)
         if direction == 0:
-            self.image = pygame.transform.rotate(self.image, 180)
-        self.image = pygame.transform.scale(self.image, (tileSize, int(tileSize / 2)))
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+            self.image = tileAtlas['spikeTop']
+        else:
+            self.image = tileAtlas['spikeBottom']
 
 
-# Button, creates a button with centered text
+# Button, creates a button with centered text. Buttons are created once and kept for the whole game, their skins are
+# shared by every button of the same size
 class Button(pygame.sprite.Sprite):
     def __init__(self, x, y, text, size, font):
         super().__init__()
-        self.defaultImage = pygame.image.load('platformer_assets/buttons/btndefault.png')
-        self.defaultImage = pygame.transform.scale(self.defaultImage, size)
-        self.hoverImage = pygame.image.load('platformer_assets/buttons/btnhover.png')
-        self.hoverImage = pygame.transform.scale(self.hoverImage, size)
-        self.pressedImage = pygame.image.load('platformer_assets/buttons/btnpressed.png')
-        self.pressedImage = pygame.transform.scale(self.pressedImage, size)
+        self.defaultImage = assets.get('platformer_assets/buttons/btndefault.png', size)
+        self.hoverImage = assets.get('platformer_assets/buttons/btnhover.png', size)
+        self.pressedImage = assets.get('platformer_assets/buttons/btnpressed.png', size)
         self.image = self.defaultImage
-        self.text = font.render(text, True, (255, 255, 255))
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
-        self.textSize = font.size(text)
-        self.textPos = (self.rect.centerx - (self.textSize[0] // 2), self.rect.centery - (self.textSize[1] // 2))
+        self.font = font
+        self.setText(text)
         self.clickCd = False
         self.coolDownCounter = 0
         buttons.add(self)
 
-    # Returns True if the button is pressed
-    def isPressed(self, mouseDown):
-        mPos = pygame.mouse.get_pos()
+    # Changes the button's text, centered on the button
+    def setText(self, text):
+        self.text = renderLabel(text, self.font)
+        self.textSize = self.text.get_size()
+        self.textPos = (self.rect.centerx - (self.textSize[0] // 2), self.rect.centery - (self.textSize[1] // 2))
+
+    # Draws the button, returns True once a click on it has played out. Clicks and hovering come from the mouse events
+    # sent to the buttons shown on the screen, a button that has just been shown checks if the mouse is already over it
+    def isPressed(self):
         menuLayer.blit(self.image, self.rect)
         menuLayer.blit(self.text, self.textPos)
+        if self not in shownWidgets:
+            self.mouseMoved(mousePos)
+        drawnWidgets.append(self)
         # If button is on cooldown, starts cooldown timer and disables actions on the button until cooldown ends
         if self.clickCd:
             if self.coolDownCounter == FPS / 6:
@@ -317,18 +341,22 @@ class Button(pygame.sprite.Sprite):
             # Plays click sound if button is clicked
             elif self.coolDownCounter == 1 and sound:
                 buttonClick.play()
-        # If the button is visible and is clicked, returns True, changes image and puts button on cooldown
-        elif self.rect.collidepoint(mPos):
-            if mouseDown:
-                self.image = self.pressedImage
-                self.clickCd = True
-            # If button is hovered but not clicked, changes image
-            elif self.image != self.hoverImage:
-                self.image = self.hoverImage
-        # If button is neither hovered nor clicked, sets image to default
-        elif self.image != self.defaultImage:
+
+    # Changes the image to hovered while the mouse is over the button and to default when it isn't
+    def mouseMoved(self, pos):
+        if self.clickCd:
+            return
+        if self.rect.collidepoint(pos):
+            self.image = self.hoverImage
+        else:
             self.image = self.defaultImage
 
+    # If the button is clicked, changes image and puts button on cooldown
+    def mouseClicked(self, pos):
+        if not self.clickCd and self.rect.collidepoint(pos):
+            self.image = self.pressedImage
+            self.clickCd = True
+
     # Update function, basically the cooldown timer for the buttons
     def update(self):
         if self.clickCd:
@@ -336,199 +364,318 @@ class Button(pygame.sprite.Sprite):
             if self.coolDownCounter == FPS / 2:
                 self.clickCd = False
                 self.coolDownCounter = 0
+                self.mouseMoved(mousePos)
 
 
 # Toggle Button, draws a checkbox button and text to the left
 class toggleButton(pygame.sprite.Sprite):
-    def __init__(self, x, y, text):
+    def __init__(self, x, y, text, pressed=True):
         super().__init__()
-        self.unpressedImage = pygame.image.load('platformer_assets/buttons/toggleunpressed.png')
-        self.pressedImage = pygame.image.load('platformer_assets/buttons/togglepressed.png')
-        self.pressed = True
-        self.image = self.pressedImage
+        self.unpressedImage = assets.get('platformer_assets/buttons/toggleunpressed.png')
+        self.pressedImage = assets.get('platformer_assets/buttons/togglepressed.png')
+        self.pressed = pressed
+        if self.pressed:
+            self.image = self.pressedImage
+        else:
+            self.image = self.unpressedImage
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
-        self.text = buttonFont.render(text, True, (255, 255, 255))
-        self.textSize = buttonFont.size(text)
+        self.text = renderLabel(text, buttonFont)
+        self.textSize = self.text.get_size()
         self.textPos = (self.rect.x - 500, self.rect.centery - self.textSize[1] // 2)
 
-    # Returns True as long as button is checkmarked
-    def isPressed(self, mouseDown):
-        mPos = pygame.mouse.get_pos()
+    # Draws the button, returns True as long as button is checkmarked
+    def isPressed(self):
         menuLayer.blit(self.image, self.rect)
         menuLayer.blit(self.text, self.textPos)
-        # If button is pressed, changes state. Eg. if button is checked, unchecks it and vice versa
-        if self.rect.collidepoint(mPos) and mouseDown:
+        drawnWidgets.append(self)
+        return self.pressed
+
+    # Toggle buttons have no hovered image
+    def mouseMoved(self, pos):
+        pass
+
+    # If button is clicked, changes state. Eg. if button is checked, unchecks it and vice versa
+    def mouseClicked(self, pos):
+        if self.rect.collidepoint(pos):
+            self.pressed = not self.pressed
             if self.pressed:
-                self.image = self.unpressedImage
-                self.pressed = False
-            # If button is not clicked, sets image to default
-            elif not self.pressed:
                 self.image = self.pressedImage
-                self.pressed = True
-        return self.pressed
+            else:
+                self.image = self.unpressedImage
 
 
 # Finish flag
-class Finish(pygame.sprite.Sprite):
+class Finish(engine.Finish):
     def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.image.load('platformer_assets/img/finish.png')
-        self.image = pygame.transform.scale(self.image, (tileSize, int(tileSize * 1.5)))
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        super().__init__(x, y)
+        self.image = tileAtlas['finish']
 
 
 # Block
-class Block(pygame.sprite.Sprite):
-    def __init__(self, x, y, image):
-        super().__init__()
-        self.image = pygame.transform.scale(image, (tileSize, tileSize))
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+class Block(engine.Block):
+    def __init__(self, x, y, tile):
+        super().__init__(x, y, tile)
+        self.image = tileAtlas[blockImages[tile]]
 
 
 # Coin
-class Coin(pygame.sprite.Sprite):
+class Coin(engine.Coin):
+    # Ticks in a full turn of the coin
+    period = FPS // 8 * 6
+
     def __init__(self, x, y):
-        super().__init__()
-        self.images = []
-        for img in range(1, 7):
-            coinImg = pygame.image.load(f'platformer_assets/img/coin{img}.png')
-            self.images.append(coinImg)
-        self.image = self.images[0]
-        self.counter = 0
-        self.index = 0
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        super().__init__(x, y)
+        self.images = coinImages
 
-    # Update function for coins, basically times the animation for the coins rotating
-    def update(self):
-        mobLayer.blit(self.image, self.rect)
-        self.counter += 1
-        if self.counter >= FPS // 8:
-            self.counter = 0
-            self.index += 1
-            if self.index > 5:
-                self.index = 0
-            self.image = self.images[self.index]
-
-
-# Moving Block
-class MovingBlock(pygame.sprite.Sprite):
+    # Image of the coin, times the animation for the coins rotating
+    @property
+    def image(self):
+        ticks = self.level.ticks if self.level is not None else 0
+        return self.images[ticks // (FPS // 8) % 6]
+
+
+# Moving Block, the image is a full tile but only the top half is solid
+class MovingBlock(engine.MovingBlock):
     def __init__(self, x, y, axis):
-        super().__init__()
-        self.image = pygame.image.load('platformer_assets/img/movingBlock.png')
-        self.image = pygame.transform.scale(self.image, (tileSize, tileSize))
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.rect.height = tileSize // 2
-        self.counter = 0
-        self.direction = 1
-        self.axis = axis
+        super().__init__(x, y, axis)
+        self.image = tileAtlas['movingBlock']
 
-    # Update function for the moving blocks, basically handle the movement
-    def update(self):
-        if self.axis == 0:
-            self.rect.x += self.direction
-        elif self.axis == 1:
-            self.rect.y += self.direction
-        self.counter += 1
-        if self.counter > tileSize:
-            self.direction *= -1
-            self.counter *= -1
-
-
-# PLayer class, stores player images, wings images, and location
-class Player(pygame.sprite.Sprite):
+
+# PLayer class, the simulation core's player with player images and wings images
+class Player(engine.Player):
     def __init__(self, x, y):
-        super().__init__()
-        self.damageCD = 0
-        self.health = 5
-        self.heart = pygame.image.load('platformer_assets/img/heart.png')
-        self.ghost = pygame.image.load('platformer_assets/img/ghost.png')
-        self.ghost = pygame.transform.scale(self.ghost, (tileSize, tileSize))
+        super().__init__(x, y)
+        self.heart = assets.get('platformer_assets/img/heart.png')
+        self.ghost = assets.get('platformer_assets/img/ghost.png', (tileSize, tileSize))
         # Image and animation images
         self.rightImg = []
         self.leftImg = []
         # Loads player images facing left and right
         for num in range(1, 6):
-            img_right = pygame.image.load(f'platformer_assets/img/player{num}.png')
-            img_right = pygame.transform.scale(img_right, (60, 90))
-            img_left = pygame.transform.flip(img_right, True, False)
+            img_right = assets.get(f'platformer_assets/img/player{num}.png', (60, 90))
+            img_left = assets.get(f'platformer_assets/img/player{num}.png', (60, 90), True)
             self.leftImg.append(img_left)
             self.rightImg.append(img_right)
         # Loads wing images facing left and right
         for num in range(1, 3):
-            wingRight = pygame.image.load(f'platformer_assets/img/wings{num}.png')
+            wingRight = assets.get(f'platformer_assets/img/wings{num}.png')
             wingWidth = wingRight.get_rect().width
-            wingLeft = pygame.transform.flip(wingRight, True, False)
+            wingLeft = assets.get(f'platformer_assets/img/wings{num}.png', flip=True)
             self.rightImg.append((wingRight, wingWidth))
             self.leftImg.append((wingLeft, wingWidth))
         self.image = self.rightImg[0]
-        self.hitbox = pygame.transform.scale(self.image, (45, 80))
-        self.rect = self.hitbox.get_rect()
-        self.width = self.hitbox.get_rect().width
-        self.height = self.hitbox.get_rect().height
-        self.rect.x = x
-        self.rect.y = y
-
-    # Takes damage if damage-taking is not on cooldown
-    def takeDamage(self):
-        if self.damageCD == 0:
-            if sound:
-                damageSound.play()
-            self.health -= 1
-            self.damageCD = 1
-
-    # Tracks damage cooldown for player and draws player
-    def update(self):
-        mobLayer.blit(self.image, (self.rect.x - 7, self.rect.y - 10))
-        if self.damageCD != 0:
-            self.damageCD += 1
-            if self.damageCD >= FPS:
-                self.damageCD = 0
+        # Position at the start of the latest tick, for interpolating between ticks when drawing
+        self.previousPos = self.rect.topleft
+
+    # Moves the player to the start of a new level
+    def respawn(self, x, y):
+        super().respawn(x, y)
+        self.updateImage()
+        self.previousPos = self.rect.topleft
+
+    # Puts the player back to a snapshot, with the image for their pose
+    def restore(self, state):
+        super().restore(state)
+        self.updateImage()
+        self.previousPos = self.rect.topleft
+
+    # Image set the player is facing, the wing images are at indexes 5 and 6
+    def imageList(self):
+        return self.leftImg if self.facingLeft else self.rightImg
+
+    # Changes the player image to the player's current pose
+    def updateImage(self):
+        facingLeft, frame = self.pose
+        self.image = (self.leftImg if facingLeft else self.rightImg)[frame]
+
+    # Draws player at its interpolated position
+    def draw(self):
+        x, y = world.drawPos(self)
+        renderer.mark(renderQueue.add(PLAYER, self.image, (x - 7, y - 10)))
+
+    # Draws player health, drawn on the menu layer each tick
+    def drawHealth(self):
         for heart in range(self.health):
             menuLayer.blit(self.heart, (400 + heart * 38, 3))
 
 
+# World class, the simulation core's level with images. Creates the level's objects with their images and draws them
+class World(engine.Level):
+    Block = Block
+    MovingBlock = MovingBlock
+    SpikeBall = SpikeBall
+    Spike = Spike
+    Coin = Coin
+    Finish = Finish
+
+    def __init__(self, data):
+        # Camera position at the start of the latest tick, and the interpolated position frames are drawn from
+        self.previousCamera = 0
+        self.previousTicks = 0
+        self.drawCamera = 0
+        self.alpha = 1
+        # Score coin image
+        self.scoreImage = assets.get('platformer_assets/img/coin1.png', (45, 45))
+        # Stationary blocks are baked into a surface for each chunk, everything else is drawn as sprites. Set up before
+        # the level loads its first chunks
+        self.tileLayer = TileLayer(len(data) * tileSize, chunkColumns * tileSize)
+        super().__init__(data, width)
+
+    # Builds a chunk's objects and bakes its tiles
+    def loadChunk(self, chunk):
+        objects = super().loadChunk(chunk)
+        # Positions at the start of the latest tick, for interpolating between ticks when drawing
+        for obj in objects:
+            obj.previousPos = obj.rect.topleft
+        self.tileLayer.addChunk(chunk, [obj for obj in objects if obj in self.blocks])
+        return objects
+
+    def unloadChunk(self, chunk):
+        self.tileLayer.removeChunk(chunk)
+        return super().unloadChunk(chunk)
+
+    # Puts the level back to a snapshot, the camera and objects are drawn where they are with no interpolation
+    def restore(self, state):
+        super().restore(state)
+        self.previousCamera = self.cameraPos
+        self.previousTicks = self.ticks
+        self.drawCamera = self.cameraPos
+        self.alpha = 1
+
+    # Saves the camera position and tick count at the start of a tick, movers are drawn from where they were then
+    def savePositions(self):
+        self.previousCamera = self.cameraPos
+        self.previousTicks = self.ticks
+
+    # Sets the interpolated camera position frames are drawn from, alpha of the way from the previous tick to the latest
+    def setView(self, alpha):
+        self.alpha = alpha
+        self.drawCamera = round(self.previousCamera + (self.cameraPos - self.previousCamera) * alpha)
+
+    # Position an object is drawn at on screen, interpolated between its previous and latest positions
+    def drawPos(self, obj):
+        x, y = obj.positionAt(self.previousTicks) if isinstance(obj, engine.Mover) else obj.previousPos
+        return (round(x + (obj.rect.x - x) * self.alpha) - self.drawCamera,
+                round(y + (obj.rect.y - y) * self.alpha))
+
+    # Converts a rect from world coordinates to screen coordinates
+    def toScreen(self, rect):
+        return rect.move(-self.drawCamera, 0)
+
+    # Area of the world currently on screen, padded by a tile so objects partway between two positions aren't missed
+    def view(self):
+        return pygame.Rect(self.drawCamera, 0, width, height).inflate(2 * tileSize, 0)
+
+    # Adds the level's tiles and the objects in view to the render queue. Objects that move or animate on their own are
+    # marked on the renderer, so partial redraws cover them
+    def queueDraw(self):
+        self.tileLayer.queue(renderQueue, TILES, self.drawCamera, width)
+        for obj in self.index.query(self.view()):
+            rect = renderQueue.add(OBJECTS, obj.image, self.drawPos(obj))
+            if hasattr(obj, 'period'):
+                renderer.mark(rect)
+        # Draws rect / hitbox of each object if in debug mode
+        if debug:
+            for obj in self.objects:
+                mobLayer.mark(pygame.draw.rect(mobLayer, (255, 255, 255), self.toScreen(obj.rect), 2))
+
+    # Draws the score, drawn on the menu layer each tick
+    def drawScore(self):
+        menuLayer.blit(self.scoreImage, (5, 10))
+        scoreGlyphs.draw(menuLayer, f'x {self.score}', (60, 20))
+
+
 # Variables ------------------------------------------------------------------------------------------------------------
 # Game constants
 width = 1000
 height = 900
-FPS = 60
-tileCount = 20
-tileSize = int(width / tileCount)
-# Load images
-
-# World
-menuImg = pygame.image.load('platformer_assets/background/menu.jpeg')
-backgroundImg = pygame.image.load('platformer_assets/background/night.jpeg')
-customLevelData = []
-# Buttons
+# Game ticks per second (FPS, from the simulation core), the game logic always runs at this rate no matter how fast
+# frames are drawn
+tickLength = 1000 / FPS
+# Frame rate cap, and the most ticks run between two frames before the game slows down instead of skipping frames
+maxFPS = 144
+maxTicksPerFrame = 5
+# Most frames a second drawn on a screen that is idle, waiting for input, see screenIdle()
+idleFPS = 4
+tileCount = width // tileSize
+# Create screen, created before any images are loaded so they can be converted to its pixel format
+screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+pygame.display.set_caption('Plateformer Game')
+startupProfile.mark('display')
+# Everything drawn straight onto the screen in a frame: the background, the level and the player
+renderQueue = RenderQueue()
+# Surfaces, the mob layer (hitboxes in debug mode) and overlay layer are redrawn every frame and the menu layer every
+# tick
+mobLayer = Layer((width, height))
+menuLayer = Layer((width, height))
+overlayLayer = Layer((width, height))
+# Composites the layers onto the screen, can be switched to only redrawing the parts of the screen that change
+renderer = FrameRenderer(screen, [mobLayer, menuLayer, overlayLayer])
+# Times the phases of each frame, shown by the overlay toggled with F3 and written to a CSV file with --profile-csv
+frameProfile = FrameProfile()
+renderer.profile = frameProfile
+profileOverlay = False
+profileText = []
+profileGraphHeight = 60
+if '--profile-csv' in sys.argv:
+    csvArguments = sys.argv[sys.argv.index('--profile-csv') + 1:]
+    frameProfile.writeCsv(csvArguments[0] if csvArguments and not csvArguments[0].startswith('--')
+                          else 'frameprofile.csv')
 
+# Load images
+assets = AssetManager()
+# Reads files and builds levels while the game keeps drawing frames
+loader = Loader()
+# Tile sprites, packed into one atlas shared by every object in a level
+tileAtlas = assets.buildAtlas({
+    'dirt': ('platformer_assets/img/dirt.png', (tileSize, tileSize)),
+    'grass_left': ('platformer_assets/img/grass_left.png', (tileSize, tileSize)),
+    'grass_center': ('platformer_assets/img/grass_center.png', (tileSize, tileSize)),
+    'grass_right': ('platformer_assets/img/grass_right.png', (tileSize, tileSize)),
+    'grass_plat_left': ('platformer_assets/img/grass_plat_left.png', (tileSize, tileSize)),
+    'grass_plat_center': ('platformer_assets/img/grass_plat_center.png', (tileSize, tileSize)),
+    'grass_plat_right': ('platformer_assets/img/grass_plat_right.png', (tileSize, tileSize)),
+    'movingBlock': ('platformer_assets/img/movingBlock.png', (tileSize, tileSize)),
+    'spikeBall1': ('platformer_assets/img/spikeBall1.png', (tileSize, tileSize)),
+    'spikeBall2': ('platformer_assets/img/spikeBall2.png', (tileSize, tileSize)),
+    'spikeTop': ('platformer_assets/img/spike.png', (tileSize, tileSize // 2), False, 180),
+    'spikeBottom': ('platformer_assets/img/spike.png', (tileSize, tileSize // 2)),
+    'finish': ('platformer_assets/img/finish.png', (tileSize, int(tileSize * 1.5))),
+    **{f'coin{num}': (f'platformer_assets/img/coin{num}.png',) for num in range(1, 7)}
+})
+# Atlas image names of the static block tiles
+blockImages = {1: 'dirt', 2: 'grass_left', 3: 'grass_center', 4: 'grass_right', 5: 'grass_plat_left',
+               6: 'grass_plat_center', 7: 'grass_plat_right'}
+coinImages = [tileAtlas[f'coin{num}'] for num in range(1, 7)]
+
+# World, the game background is loaded after the first frame
+menuImg = assets.load('platformer_assets/background/menu.jpeg')
+backgroundImg = None
+startupProfile.mark('images')
 
-# Mobs
 # Pygame variables
 clock = pygame.time.Clock()
 keyPressed = pygame.key.get_pressed()
 font = pygame.font.SysFont('Times New Roman', 15)
 buttonFont = pygame.font.Font('platformer_assets/simply_rounded.ttf', 50)
 smallFont = pygame.font.Font('platformer_assets/simply_rounded.ttf', 25)
-
-damageSound = pygame.mixer.Sound('platformer_assets/audio/damage.ogg')
-damageSound.set_volume(2)
-buttonClick = pygame.mixer.Sound('platformer_assets/audio/click.ogg')
-deathSound = pygame.mixer.Sound('platformer_assets/audio/death.ogg')
-jumpSound = pygame.mixer.Sound('platformer_assets/audio/jump.ogg')
-walkSound = pygame.mixer.Sound('platformer_assets/audio/walk.ogg')
-finishSound = pygame.mixer.Sound('platformer_assets/audio/finish.ogg')
-coinSound = pygame.mixer.Sound('platformer_assets/audio/coin.ogg')
+# Rendered texts, and the glyphs the score and FPS counter are drawn from as they change
+textCache = TextCache()
+scoreGlyphs = GlyphStrip(smallFont, 'x 0123456789', (255, 204, 0))
+fpsGlyphs = GlyphStrip(font, 'FPS: 0123456789', (255, 255, 255), False)
+startupProfile.mark('fonts')
+
+# Sound effects, decoded after the first frame or when first played
+damageSound = LazySound('platformer_assets/audio/damage.ogg', 2)
+buttonClick = LazySound('platformer_assets/audio/click.ogg')
+deathSound = LazySound('platformer_assets/audio/death.ogg')
+jumpSound = LazySound('platformer_assets/audio/jump.ogg')
+walkSound = LazySound('platformer_assets/audio/walk.ogg')
+finishSound = LazySound('platformer_assets/audio/finish.ogg')
+coinSound = LazySound('platformer_assets/audio/coin.ogg')
+startupSound = LazySound('platformer_assets/audio/startup.ogg', 0.1)
 
 walkChannel = pygame.mixer.Channel(5)
 
@@ -537,20 +684,41 @@ music = pygame.mixer.music
 music.set_volume(0.25)
 
 # Game variables
-levelSelect = pygame.sprite.Group()
+world = None
+# Level being played, maxLvls for the custom level
+currentLevel = 0
+# Jobs loading the level being entered and the next music track, None when nothing is loading
+levelJob = None
+musicJob = None
+# Snapshots of the world and player taken when the level was loaded, restored when the level is restarted
+worldStart = None
+playerStart = None
+restartLevel = False
+# Level select buttons, one for each level on a page, and the page shown
+levelSelect = []
+levelsPerPage = 6
+levelPage = 0
 gamestate = 0
-mouseDown = False
+# Mouse position, kept up to date from the mouse events for buttons as they are shown
+mousePos = pygame.mouse.get_pos()
+# Buttons drawn on the screen last tick, which the mouse events are sent to, and the buttons drawn so far this tick
+shownWidgets = []
+drawnWidgets = []
 sound = True
 musicControl = True
 fpsCounter = True
+# Idle throttling, menus and the pause and level end screens wait for input instead of running at full rate while
+# nothing on them changes. --full-rate starts the game with it off
+idleThrottle = '--full-rate' not in sys.argv
 pause = False
 # Debug
 debug = False
 cheats = False
 
-# Creates player class
-# Exists so imgList isn't undefined. Would be fixed by moving imgList into player class
-player = Player(150, height - 500)
+# Creates player class after the first frame, the player is moved to the start of each level as it is loaded
+player = None
+# Runs the player through the current level
+simulation = None
 
 # Buttons----------------------------------------------
 buttons = pygame.sprite.Group()
@@ -560,43 +728,222 @@ customLevelBtn = Button(width // 2 - 4 * tileSize, 2 * height // 5, 'Custom Leve
                         buttonFont)
 settings = Button(width // 2 - 4 * tileSize, 3 * height // 5, 'Settings', (8 * tileSize, 2 * tileSize), buttonFont)
 quitBtn = Button(width // 2 - 4 * tileSize, 4 * height // 5, 'Quit', (8 * tileSize, 2 * tileSize), buttonFont)
-# Settings menu
-pauseBtn = Button(width - 125, 10, 'Pause', (2 * tileSize, tileSize), smallFont)
-soundToggle = toggleButton(750, 200, 'SoundFX ON/OFF')
-musicToggle = toggleButton(750, 275, 'Music ON/OFF')
-fpsToggle = toggleButton(750, 350, 'FPS Counter ON/OFF')
-back = Button(width // 2 - 4 * tileSize, 3 * height // 5, 'Back', (8 * tileSize, 2 * tileSize), buttonFont)
-mainMenu = Button(width // 2 - 4 * tileSize, 4 * height // 5, 'Main Menu', (8 * tileSize, 2 * tileSize), buttonFont)
-# Level buttons
-restart = Button(width // 2 - 4 * tileSize, 3.5 * height // 5, 'Restart', (8 * tileSize, 2 * tileSize), buttonFont)
-nextLevel = Button(width // 2 - 4 * tileSize, 3.5 * height // 5, 'Next Level', (8 * tileSize, 2 * tileSize), buttonFont)
+startupProfile.mark('main menu')
 
 # Player variables-------------------------------------
-moveIndex = 0
-walkCounter = 0
-yVel = 0
-yAccel = 1
-imgList = player.rightImg
-onBlock = False
+# Input flags for the current tick, key presses are collected from the tick's events
+tickInputs = 0
 # Addons
 wings = True
-wingCounter = 0
+# Wing image drawn this tick, None if the wings are closed
+wingFrame = None
 fly = False
 
-# Create screen
-screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
-pygame.display.set_caption('Plateformer Game')
-# Surfaces
-mobLayer = pygame.surface.Surface((width, height)).convert_alpha()
-menuLayer = pygame.surface.Surface((width, height)).convert_alpha()
 
-# Startup sounds
-startupSound = pygame.mixer.Sound('platformer_assets/audio/startup.ogg')
-startupSound.set_volume(0.1)
-startupSound.play()
+# Startup steps run after the first frame, one each frame while the main menu is shown ------------------------------
+def playStartupSound():
+    startupSound.play()
+
+
+def loadSounds():
+    for soundEffect in (damageSound, buttonClick, deathSound, jumpSound, walkSound, finishSound, coinSound):
+        soundEffect.load()
+
+
+def loadGameImages():
+    global backgroundImg, player
+    backgroundImg = assets.load('platformer_assets/background/night.jpeg')
+    player = Player(150, height - 500)
+
+
+# Buttons of the settings, pause, level select and level end screens
+def buildGameUI():
+    global pauseBtn, soundToggle, musicToggle, fpsToggle, partialRedrawToggle, idleToggle, back, mainMenu, restart
+    global nextLevel, previousPage, nextPage
+    # Settings menu
+    pauseBtn = Button(width - 125, 10, 'Pause', (2 * tileSize, tileSize), smallFont)
+    soundToggle = toggleButton(750, 200, 'SoundFX ON/OFF')
+    musicToggle = toggleButton(750, 275, 'Music ON/OFF')
+    fpsToggle = toggleButton(750, 350, 'FPS Counter ON/OFF')
+    partialRedrawToggle = toggleButton(750, 425, 'Partial Redraw ON/OFF', False)
+    idleToggle = toggleButton(750, 500, 'Idle Throttle ON/OFF', idleThrottle)
+    back = Button(width // 2 - 4 * tileSize, 3 * height // 5, 'Back', (8 * tileSize, 2 * tileSize), buttonFont)
+    mainMenu = Button(width // 2 - 4 * tileSize, 4 * height // 5, 'Main Menu', (8 * tileSize, 2 * tileSize),
+                      buttonFont)
+    # Level buttons
+    restart = Button(width // 2 - 4 * tileSize, 3.5 * height // 5, 'Restart', (8 * tileSize, 2 * tileSize),
+                     buttonFont)
+    nextLevel = Button(width // 2 - 4 * tileSize, 3.5 * height // 5, 'Next Level', (8 * tileSize, 2 * tileSize),
+                       buttonFont)
+    # Level select page, levelsPerPage buttons two to a row, relabelled with the levels of the page shown by
+    # showLevelPage(). Previous and next page buttons either side of the main menu button
+    for slot in range(levelsPerPage):
+        levelSelect.append(Button(75 + slot % 2 * 450, 200 + slot // 2 * 200, '', (8 * tileSize, 2 * tileSize),
+                                  buttonFont))
+    previousPage = Button(75, 745, 'Previous', (3 * tileSize, tileSize), smallFont)
+    nextPage = Button(width - 75 - 3 * tileSize, 745, 'Next', (3 * tileSize, tileSize), smallFont)
+
+
+# Shows a page of the level select screen, labelling its buttons with the levels' names or 'LOCKED'
+def showLevelPage(page):
+    global levelPage
+    levelPage = page
+    for slot, button in enumerate(levelSelect):
+        level = page * levelsPerPage + slot
+        if level < maxLvls:
+            button.setText(levelPack.names[level] if unlocked[level] else 'LOCKED')
+
+
+deferredStartup = [('startup sound', playStartupSound), ('sound effects', loadSounds),
+                   ('game images', loadGameImages), ('game ui', buildGameUI)]
+# Prints the startup report when the first frame is drawn and when the deferred steps are done
+printStartupProfile = '--startup-profile' in sys.argv
+
+
+# Runs the next deferred startup step
+def continueStartup():
+    name, step = deferredStartup.pop(0)
+    startupProfile.time(name, step)
+    if not deferredStartup and printStartupProfile:
+        print(startupProfile.report())
+
+
+# Runs every deferred startup step left, before anything that needs them
+def finishStartup():
+    while deferredStartup:
+        continueStartup()
+
+
+# Benchmark mode, plays a level file with scripted input for a number of ticks, one tick per frame as fast as frames can
+# be drawn, restarting the level whenever it ends. Prints a summary of the run as JSON and exits. Used by
+# benchmarks.suite:
+#     python platformer.py --benchmark <level file> [ticks] [seed]
+benchmark = None
+if '--benchmark' in sys.argv:
+    benchmarkArguments = []
+    for argument in sys.argv[sys.argv.index('--benchmark') + 1:]:
+        if argument.startswith('--'):
+            break
+        benchmarkArguments.append(argument)
+    customLevelPath = benchmarkArguments[0]
+    benchmarkTicks = int(benchmarkArguments[1]) if len(benchmarkArguments) > 1 else 1200
+    benchmarkSeed = int(benchmarkArguments[2]) if len(benchmarkArguments) > 2 else 0
+    benchmark = BenchmarkRun(engine.randomInputs(benchmarkSeed, benchmarkTicks))
+    currentLevel = maxLvls
+    gamestate = 0.5
+    # The player can't die, and the level is built on the main thread so the build can be timed on its own
+    cheats = True
+    sound = False
+    musicControl = False
+    loader.threaded = False
+
+# Every level attempt is recorded as it is played. F5 saves the current attempt so far to recordingFolder, and with
+# --record every attempt is saved there when it ends
+recording = None
+recordingFolder = 'recordings'
+recordAttempts = '--record' in sys.argv
+# Replay mode, plays a recording back tick for tick, one tick per frame as fast as frames can be drawn, or at normal
+# speed with --realtime. Prints a summary of the run as JSON, including whether it ended in the same state as the
+# recording, and exits:
+#     python platformer.py --replay <recording file> [--realtime]
+replay = None
+realtime = False
+if '--replay' in sys.argv:
+    replay = replayfile.loadRecording(sys.argv[sys.argv.index('--replay') + 1])
+    benchmark = BenchmarkRun(replay.inputs)
+    currentLevel = replay.level
+    cheats, wings, fly = replay.cheats, replay.wings, replay.fly
+    gamestate = 0.5
+    # Built on the main thread, so the replay starts on the same tick however long the level takes to build
+    loader.threaded = False
+    realtime = '--realtime' in sys.argv
+    sound = realtime
+    musicControl = realtime
+
+
+# Idle benchmark, leaves the game on the main menu for a number of seconds, then prints how much of a core it used as
+# JSON and exits. Used by benchmarks.idle:
+#     python platformer.py --idle-benchmark [seconds] [--full-rate]
+idleBenchmark = None
+if '--idle-benchmark' in sys.argv:
+    idleArguments = sys.argv[sys.argv.index('--idle-benchmark') + 1:]
+    idleBenchmarkSeconds = float(idleArguments[0]) if idleArguments and not idleArguments[0].startswith('--') else 10
+    idleBenchmark = time.perf_counter()
+
+
+# True while the screen only changes on input: a menu, or the pause or level end screens, with nothing loading, no
+# button click playing out and no startup steps left to run. Benchmarks and replays are never idle
+def screenIdle():
+    if not idleThrottle or benchmark is not None or deferredStartup or loader.progress() < 1:
+        return False
+    if gamestate == 0.5 or gamestate == 1 and not pause:
+        return False
+    return not any(button.clickCd for button in buttons)
+
+
+# Waits until an event arrives or timeout milliseconds have passed, the event is kept for the next tick
+def waitForInput(timeout):
+    event = pygame.event.wait(timeout)
+    if event.type != pygame.NOEVENT:
+        frameEvents.append(event)
+
 
 # Main game loop -------------------------------------------------------------------------------------------------------
+# Time not yet simulated, in milliseconds. Starts at one tick so the first tick runs before the first frame is drawn
+accumulator = tickLength
+ticksThisFrame = 0
+frameEvents = []
 while True:
+    # Draws a frame once the game logic has caught up with the time passed, then waits for the next frame. If the
+    # logic can't keep up, the time it is behind by is dropped so it doesn't fall further and further behind
+    if accumulator < tickLength or ticksThisFrame == maxTicksPerFrame:
+        if ticksThisFrame == maxTicksPerFrame:
+            accumulator %= tickLength
+        drawFrame(accumulator / tickLength)
+        frameProfile.phase(None)
+        if startupProfile.firstFrame is None:
+            startupProfile.markFirstFrame()
+            if printStartupProfile:
+                print(startupProfile.report())
+        elif deferredStartup:
+            continueStartup()
+        # Benchmarks and replays run exactly one tick per frame, without waiting, unless the replay is in real time. An
+        # idle screen waits for input, or until idleFPS allows the next frame, and runs one tick for it
+        idle = screenIdle()
+        if benchmark is not None and not realtime:
+            clock.tick()
+            accumulator += tickLength
+        elif idle:
+            waitForInput(1000 // idleFPS)
+            clock.tick()
+            accumulator += tickLength
+        else:
+            accumulator += clock.tick(maxFPS)
+        # Collision tests are counted by the world, and taken for each frame
+        collisionTests = 0
+        if world is not None:
+            collisionTests, world.collisionTests = world.collisionTests, 0
+        frameProfile.endFrame(collisionTests, renderer.blitCount, textCache.countRenders(), idle)
+        if idleBenchmark is not None and time.perf_counter() - idleBenchmark >= idleBenchmarkSeconds:
+            print(json.dumps({'seconds': sum(frameProfile.wallSeconds), 'frames': frameProfile.frames,
+                              'cpuPercent': frameProfile.cpuUsage(), 'idleCpuPercent': frameProfile.cpuUsage(True),
+                              'activeCpuPercent': frameProfile.cpuUsage(False)}))
+            frameProfile.close()
+            pygame.quit()
+            sys.exit()
+        ticksThisFrame = 0
+        frameProfile.phase('events')
+        frameEvents += pygame.event.get()
+        continue
+    # Game tick --------------------------------------------------------------------------------------------------------
+    frameProfile.phase('game')
+    accumulator -= tickLength
+    ticksThisFrame += 1
+    if world is not None:
+        world.savePositions()
+        player.previousPos = player.rect.topleft
+    wingFrame = None
+
     # Stops music if not inside a game level or music is turned off
     if gamestate != 1 or not musicControl:
         if gamestate != 2 and music.get_busy():
@@ -606,361 +953,277 @@ while True:
         if walkChannel.get_busy():
             walkSound.stop()
 
-    # Resets each layer
-    mobLayer.fill((0, 0, 0, 0))
-    menuLayer.fill((0, 0, 0, 0))
+    # Resets the menu layer
+    renderer.clearLayers(menuLayer)
 
-    # Sets background for menu and game level
-    if gamestate != 0 and gamestate != 0.2 and gamestate != 0.1:
-        screen.blit(backgroundImg, (0, 0))
-    else:
-        screen.blit(menuImg, (0, 0))
-
-    # Gets keypresses for shift jumping
+    # Gets held keys as simulation input flags
+    frameProfile.phase('events')
     keyPressed = pygame.key.get_pressed()
-    # Resets mouseclick status
-    if mouseDown:
-        mouseDown = False
-    # Checks queue for actionable events
-    for event in pygame.event.get():
+    tickInputs = 0
+    if keyPressed[pygame.K_LEFT] or keyPressed[pygame.K_a]:
+        tickInputs |= engine.LEFT
+    if keyPressed[pygame.K_RIGHT] or keyPressed[pygame.K_d]:
+        tickInputs |= engine.RIGHT
+    if keyPressed[pygame.K_SPACE]:
+        tickInputs |= engine.JUMP
+    # Jumps slightly lower when holding shift
+    if keyPressed[pygame.K_LSHIFT]:
+        tickInputs |= engine.SHORT_JUMP
+    # Checks events collected since the last tick for actionable events
+    for event in frameEvents:
         # Quits game if user clicks x button
         if event.type == pygame.QUIT:
             pygame.quit()
             sys.exit()
-        # Player jump inputs
+        # Player jump and direction key presses
         if event.type == pygame.KEYDOWN and gamestate == 1:
-            # Makes player jump
-            if event.key == pygame.K_SPACE and onBlock:
-                # Plays game sounds
-                if sound:
-                    jumpSound.play()
-                # Jumps slightly lower when holding shift
-                if keyPressed[pygame.K_LSHIFT]:
-                    yVel = -16
-                # Jumps higher when not holding shift
-                else:
-                    yVel = -21
-            # Makes it so that player img changes as soon as a key is pressed
-            if event.key in [pygame.K_RIGHT, pygame.K_d, pygame.K_LEFT, pygame.K_a]:
-                if event.key in [pygame.K_RIGHT, pygame.K_d]:
-                    imgList = player.rightImg
-                elif event.key in [pygame.K_LEFT, pygame.K_a]:
-                    imgList = player.leftImg
-                player.image = imgList[1]
-        # Updates mouse button status
+            if event.key == pygame.K_SPACE:
+                tickInputs |= engine.JUMP_PRESSED
+            if event.key in [pygame.K_RIGHT, pygame.K_d]:
+                tickInputs |= engine.RIGHT_PRESSED
+            elif event.key in [pygame.K_LEFT, pygame.K_a]:
+                tickInputs |= engine.LEFT_PRESSED
+        # Toggles the frame profile overlay
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profileOverlay = not profileOverlay
+        # Saves the recording of the current attempt
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F5 and recording is not None:
+            saveRecording()
+        # Sends mouse movement and clicks to the buttons on the screen. Nothing is hovered while the mouse is outside
+        # the window
+        if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.WINDOWLEAVE):
+            mousePos = (-1, -1) if event.type == pygame.WINDOWLEAVE else event.pos
+            for widget in shownWidgets:
+                widget.mouseMoved(mousePos)
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == pygame.BUTTON_LEFT:
-            mouseDown = True
-    # Resets player jump status so that it is disabled unless there is a Y collision later on
-    if onBlock:
-        onBlock = False
+            for widget in shownWidgets:
+                widget.mouseClicked(event.pos)
+        # Window moved to another display or resized, images may need converting to a new pixel format
+        if event.type in (pygame.WINDOWDISPLAYCHANGED, pygame.VIDEORESIZE):
+            checkDisplayFormat()
+            renderer.redrawAll()
+    frameEvents = []
+    frameProfile.phase('game')
+    # Benchmarks and replays end once all their input has been played. A replay's summary says whether it ended in the
+    # same state as the recording
+    if benchmark is not None and benchmark.done() and gamestate in (1, 2, -1):
+        results = {'state': simulation.state()}
+        if replay is not None:
+            results['matches'] = simulation.state() == replay.result
+        print(json.dumps(benchmark.summary(imageMemory=assets.memoryUsage(), peakMemory=peakMemory(), **results)))
+        frameProfile.close()
+        pygame.quit()
+        sys.exit()
     # Main Menu --------------------------------------------------------------------------------------------------------
     if gamestate == 0:
         # Checks which levels are unlocked when button is pressed and changes to levels screen
-        if start.isPressed(mouseDown):
+        if start.isPressed():
             gamestate = 0.1
-            # Generates level select page
-            levelSelect.empty()
-            row = 0
-            column = 0
-            for level in range(len(levels)):
-                if levels[level][1] == 0:
-                    levelbtn = Button(75 + column * 450, 200 + row * 200, 'LOCKED', (8 * tileSize, 2 * tileSize),
-                                      buttonFont)
-                else:
-                    levelbtn = Button(75 + column * 450, 200 + row * 200, f'Level {level + 1}',
-                                      (8 * tileSize, 2 * tileSize), buttonFont)
-                levelSelect.add(levelbtn)
-                column += 1
-                if column == 2:
-                    column = 0
-                    row += 1
-        # If custom level button is pressed, checks for custom level file and attempts to load it.
-        if customLevelBtn.isPressed(mouseDown):
-            try:
-                customLevelData = []
-                with open(f'platformer_assets/levels/customlevel.txt', 'r') as lvlData:
-                    for row in lvlData:
-                        rowData = []
-                        row = row.strip('\n').split(', ')
-                        for block in row:
-                            rowData.append(intCheck(block))
-                        customLevelData.append(rowData)
-            except FileNotFoundError:
-                pass
-            else:
-                currentLevel = maxLvls
-                currentLevelData = customLevelData
-                gamestate = 0.5
+            # Opens the level select on the page of the level played last
+            finishStartup()
+            showLevelPage(min(currentLevel, maxLvls - 1) // levelsPerPage)
+        # If custom level button is pressed, attempts to load the custom level file, if there isn't one the game goes
+        # back to the main menu once the level has failed to load
+        if customLevelBtn.isPressed():
+            # The file may have changed since the custom level was last played
+            worldCache.pop(maxLvls, None)
+            currentLevel = maxLvls
+            gamestate = 0.5
         # Settings button, changes to settings screen
-        if settings.isPressed(mouseDown):
+        if settings.isPressed():
             gamestate = 0.2
         # Exits the program
-        if quitBtn.isPressed(mouseDown):
+        if quitBtn.isPressed():
             pygame.quit()
             sys.exit()
+    # Every other screen needs what the deferred startup steps load
+    if gamestate != 0:
+        finishStartup()
     # Level select page, loads the level pressed -----------------------------------------------------------------------
     if gamestate == 0.1:
-        levelNum = 0
-        for level in levelSelect.sprites():
-            if level.isPressed(mouseDown):
-                if levels[levelNum][1] != 0:
-                    currentLevel = levelNum
-                    currentLevelData = levels[currentLevel][0]
-                    gamestate = 0.5
-            levelNum += 1
+        for slot, button in enumerate(levelSelect):
+            levelNum = levelPage * levelsPerPage + slot
+            if levelNum < maxLvls and button.isPressed() and unlocked[levelNum]:
+                currentLevel = levelNum
+                gamestate = 0.5
+        # Page number and the buttons to the pages either side, if there are any
+        if maxLvls > levelsPerPage:
+            pageText = renderLabel(f'Page {levelPage + 1} / {-(-maxLvls // levelsPerPage)}', smallFont)
+            menuLayer.blit(pageText, (width // 2 - pageText.get_width() // 2, 130))
+        if levelPage > 0 and previousPage.isPressed():
+            showLevelPage(levelPage - 1)
+        if (levelPage + 1) * levelsPerPage < maxLvls and nextPage.isPressed():
+            showLevelPage(levelPage + 1)
         # Changes to main menu screen
-        if mainMenu.isPressed(mouseDown):
+        if mainMenu.isPressed():
             gamestate = 0
 
     # Settings menu ----------------------------------------------------------------------------------------------------
     if gamestate == 0.2:
         # Settings buttons
-        pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(125, 125, 750, 750), 0, 50)
-        sound = soundToggle.isPressed(mouseDown)
-        musicControl = musicToggle.isPressed(mouseDown)
-        fpsCounter = fpsToggle.isPressed(mouseDown)
+        menuLayer.mark(pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(125, 125, 750, 750), 0, 50))
+        sound = soundToggle.isPressed()
+        musicControl = musicToggle.isPressed()
+        fpsCounter = fpsToggle.isPressed()
+        # Only redraws the parts of the screen that change, for slower machines
+        renderer.setPartial(partialRedrawToggle.isPressed())
+        # Waits for input on screens where nothing is happening, to save power
+        idleThrottle = idleToggle.isPressed()
         # Navigates back to main menu
-        if mainMenu.isPressed(mouseDown):
+        if mainMenu.isPressed():
             gamestate = 0
 
     # World loading, enters game after data is loaded ------------------------------------------------------------------
     if gamestate == 0.5:
-        world = World(currentLevelData)
-        player = Player(300, height - 500)
-        gamestate = 1
+        # Restarting puts the world and player back to their snapshots from when the level was loaded
+        if restartLevel:
+            world.restore(worldStart)
+            player.restore(playerStart)
+            restartLevel = False
+            startAttempt()
+            gamestate = 1
+        else:
+            if levelJob is None:
+                levelJob = loadWorld(currentLevel)
+            # The level starts once its world is loaded, until then the loading screen is shown
+            if levelJob.done:
+                if benchmark is not None and benchmark.buildSeconds is None:
+                    benchmark.buildSeconds = levelJob.seconds
+                try:
+                    world, worldStart = levelJob.result()
+                except FileNotFoundError:
+                    gamestate = 0
+                else:
+                    worldCache[currentLevel] = (world, worldStart)
+                    if len(worldCache) > worldCacheSize:
+                        worldCache.popitem(last=False)
+                    player.respawn(300, height - 500)
+                    playerStart = player.snapshot()
+                    startAttempt()
+                    gamestate = 1
+                levelJob = None
+            else:
+                drawLoadingScreen()
 
     # Main game --------------------------------------------------------------------------------------------------------
     if gamestate == 1:
-        # Starts background music if no music is playing, and if music is enabled
+        # Starts background music if no music is playing, and if music is enabled. The track is read on the loader
+        # thread and played from memory once it has been read
         if not pygame.mixer.music.get_busy() and musicControl:
-            music.load(f'platformer_assets/audio/musicTrack{random.randint(1, 4)}.ogg')
-            music.play(-1)
+            if musicJob is None:
+                musicJob = loader.submit(readFile, f'platformer_assets/audio/musicTrack{random.randint(1, 4)}.ogg')
+            if musicJob.done:
+                music.load(io.BytesIO(musicJob.result()), 'ogg')
+                music.play(-1)
+                musicJob = None
+        # Benchmarks and replays play scripted input instead of the keyboard's, a replay's pauses are played with it
+        if benchmark is not None:
+            tickInputs = benchmark.nextInputs()
+            if replay is not None:
+                pause = bool(tickInputs & replayfile.PAUSED)
+                tickInputs &= ~replayfile.PAUSED
+        recording.record(tickInputs, pause)
+        # Runs a tick of the level, while the game is paused only key presses change the player
+        simulation.update(tickInputs, pause)
+        frameProfile.phase('game')
+        player.updateImage()
+        wingFrame = player.wingFrame
+        # Plays the sounds for what happened in the tick
+        if sound:
+            if simulation.events & engine.JUMPED:
+                jumpSound.play()
+            if simulation.events & engine.DAMAGED:
+                damageSound.play()
+            if simulation.events & engine.COIN:
+                coinSound.play()
+            if simulation.events & engine.FINISHED:
+                finishSound.play()
+            if simulation.events & engine.DIED:
+                deathSound.play()
         # If the game is not paused, runs the game
         if not pause:
-            # Updates all objects in the map
-            world.objects.update()
-            # Player and mob collisions, coin collisions, and finish line collision
-            if pygame.sprite.spritecollide(player, world.damage, False) and not cheats:
-                player.takeDamage()
-            if pygame.sprite.spritecollide(player, world.coins, True):
-                world.score += 1
-                if sound:
-                    coinSound.play()
-            if pygame.sprite.spritecollide(player, world.finishFlags, False):
-                gamestate = 2
-                if sound:
-                    finishSound.play()
-
-            # Player movement
-            moveY = 0
-            moveX = 0
-            keyPressed = pygame.key.get_pressed()
-            # Move left
-            if keyPressed[pygame.K_LEFT] or keyPressed[pygame.K_a]:
-                moveX -= 5
-                walkCounter += 1
-                # Changes player image set to face left
-                if imgList != player.leftImg:
-                    imgList = player.leftImg
-            # Move right
-            if keyPressed[pygame.K_RIGHT] or keyPressed[pygame.K_d]:
-                moveX += 5
-                walkCounter += 1
-                # Changes player image set to face right
-                if imgList != player.rightImg:
-                    imgList = player.rightImg
-            # If player is not moving, changes player image to standing
-            if moveX == 0:
-                player.image = imgList[0]
-
-            # Player movement animation
-            elif walkCounter >= FPS / 6:
-                walkCounter = 0
-                if player.image != imgList[1]:
-                    player.image = imgList[1]
-                else:
-                    player.image = imgList[2]
-
-            # Gravity and falling
-            # Fly mechanic, not really implemented. Only really used for testing at the moment
-            if fly and keyPressed[pygame.K_SPACE]:
-                if yVel > -10:
-                    yVel -= 2
-                else:
-                    yVel = -10
-            # Gliding if wings are enabled
-            elif wings and keyPressed[pygame.K_SPACE]:
-                if yVel < 0:
-                    yVel += 1
-                else:
-                    # Wing open animation
-                    if wingCounter < FPS // 10:
-                        wingCounter += 1
-                        mobLayer.blit(imgList[5][0], (player.rect.centerx - imgList[5][1] // 2, player.rect.y + 10))
-                    else:
-                        mobLayer.blit(imgList[6][0], (player.rect.centerx - imgList[6][1] // 2, player.rect.y + 10))
-                    # Gliding fall speed
-                    yVel = 3
-            else:
-                # Wing close animation
-                if wings and wingCounter > 0:
-                    wingCounter -= 1
-                    mobLayer.blit(imgList[5][0], (player.rect.centerx - imgList[5][1] // 2, player.rect.y + 10))
-                if yVel < 10:
-                    yVel += 1
-                else:
-                    yVel = 10
-
-            moveY = yVel
-
-            # Player collision checks
-            # Moving blocks collision
-            for movingBlock in world.movingBlocks:
-                # Horizontal collisions
-                if movingBlock.rect.colliderect(player.rect.x + moveX, player.rect.y, player.width, player.height):
-                    # Checks for collisions with left side of moving block
-                    if player.rect.right + moveX - movingBlock.rect.left < 15:
-                        moveX = movingBlock.rect.left - player.rect.right
-                    # Checks for collision with right side of moving block
-                    if movingBlock.rect.right - player.rect.left + moveX < 15:
-                        moveX = movingBlock.rect.right - player.rect.left
-                # Vertical collisions
-                elif movingBlock.rect.colliderect(player.rect.x, player.rect.y + moveY, player.width, player.height):
-                    # Checks for collision with bottom of moving block
-                    if movingBlock.rect.bottom - player.rect.top + moveY < 15:
-                        yVel = 0
-                        moveY = movingBlock.rect.bottom - player.rect.top
-                    # Checks for collision with top of moving block
-                    elif player.rect.bottom + moveY - movingBlock.rect.top < 20:
-                        moveY = movingBlock.rect.top - player.rect.bottom - 1
-                        onBlock = True
-                        # Allows player to move horizontally with block if they are atop it
-                        if movingBlock.axis == 0:
-                            moveX += movingBlock.direction
-
-            # Collisions for stationary blocks
-            for block in world.blocks:
-                # Horizontal collision
-                if block.rect.colliderect(player.rect.x + moveX, player.rect.y, player.width, player.height):
-                    moveX = 0
-                # Vertical collision
-                elif block.rect.colliderect(player.rect.x, player.rect.y + moveY, player.width, player.height):
-                    # Calculates collision and movement if player is moving up
-                    if yVel < 0:
-                        moveY = block.rect.bottom - player.rect.top
-                        yVel = 0
-                    # Calculates collision and movement if player is moving down
-                    elif yVel >= 0:
-                        moveY = block.rect.top - player.rect.bottom
-                        onBlock = True
-            # Changes player image for falling and jumping
-            if yVel <= 0:
-                player.image = imgList[3]
-            elif yVel > 0 and not onBlock:
-                player.image = imgList[4]
             # Plays walking sound effects if sound is enabled and player is walking along ground
-            if sound and onBlock and abs(moveX) > 1:
+            if sound and player.onBlock and abs(player.moveX) > 1:
                 if not walkChannel.get_busy():
-                    walkChannel.play(walkSound)
+                    walkChannel.play(walkSound.load())
             elif walkChannel.get_busy():
                 walkSound.stop()
-
-            # Camera movement, keeps player on center left of screen unless map is at edges
-            if world.cameraPos + moveX < 0 or world.cameraPos + moveX > 3000:
-                player.rect.x += moveX
-            # If the player is not at center left, allows player to move there first before locking camera
-            elif moveX < 0 and player.rect.x + moveX > 375:
-                player.rect.x += moveX
-            elif moveX > 0 and player.rect.x + moveX < 375:
-                player.rect.x += moveX
-            else:
-                for obj in world.objects:
-                    obj.rect.x -= moveX
-                world.cameraPos += moveX
-
-            # If player has no more health, kills player
-            player.rect.y += moveY
-            if player.health <= 0:
-                # Plays death sound if player dies
-                if sound:
-                    deathSound.play()
-                gamestate = -1
+            # Finishing the level or running out of health ends the game
+            if simulation.status != engine.PLAYING:
+                gamestate = simulation.status
+                if recordAttempts:
+                    saveRecording()
 
             # Pause button
-            if pauseBtn.isPressed(mouseDown):
+            if pauseBtn.isPressed():
                 pause = True
 
 
         # Pause menu
         else:
             # Background box for pause menu
-            pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(125, 125, 750, 750), 0, 50)
+            menuLayer.mark(pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(125, 125, 750, 750), 0, 50))
             # Toggle buttons
-            sound = soundToggle.isPressed(mouseDown)
-            musicControl = musicToggle.isPressed(mouseDown)
-            fpsCounter = fpsToggle.isPressed(mouseDown)
+            sound = soundToggle.isPressed()
+            musicControl = musicToggle.isPressed()
+            fpsCounter = fpsToggle.isPressed()
             # Shows what level is currently active, if the level is a custom level, draws 'Custom Level'
-            if currentLevelData != customLevelData:
-                menuLayer.blit(buttonFont.render(f'Level {currentLevel + 1}', True, (255, 255, 255)),
+            if currentLevel != maxLvls:
+                menuLayer.blit(renderLabel(levelPack.names[currentLevel], buttonFont),
                                (width // 2 - 75, 2.5 * height // 5))
             else:
-                menuLayer.blit(buttonFont.render('Custom Level', True, (255, 255, 255)),
+                menuLayer.blit(renderLabel('Custom Level', buttonFont),
                                (width // 2 - 150, 2.5 * height // 5))
 
             # Restart, back to game, and main menu buttons
-            if restart.isPressed(mouseDown):
+            if restart.isPressed():
                 gamestate = 0.5
+                restartLevel = True
                 pause = False
-            if back.isPressed(mouseDown):
+            if back.isPressed():
                 pause = False
-            if mainMenu.isPressed(mouseDown):
+            if mainMenu.isPressed():
                 gamestate = 0
                 pause = False
-        # Draws a grid for debugging, and draws player hitbox
-        if debug:
-            drawGrid(world.cameraPos)
-            pygame.draw.rect(screen, (255, 255, 255), player.rect, 2)
+
+    # Benchmarks restart the level as soon as it ends, until all their input has been played
+    if benchmark is not None and not benchmark.done() and (gamestate == 2 or gamestate == -1):
+        gamestate = 0.5
+        restartLevel = True
 
     # Victory screen ---------------------------------------------------------------------------------------------------
     if gamestate == 2:
         # Displays score achieved for the level, and draws main menu and next level button
-        pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(275, 500, 450, 350), 0, 50)
-        menuLayer.blit(buttonFont.render(f'Score: {world.score}', True, (255, 255, 255)),
+        menuLayer.mark(pygame.draw.rect(menuLayer, (255, 204, 0), pygame.Rect(275, 500, 450, 350), 0, 50))
+        menuLayer.blit(renderLabel(f'Score: {world.score}', buttonFont),
                        (width // 2 - 100, 2.75 * height // 5))
-        if mainMenu.isPressed(mouseDown):
+        if mainMenu.isPressed():
             if currentLevel < maxLvls - 1:
                 currentLevel += 1
-                levels[currentLevel][1] = 1
+                unlocked[currentLevel] = True
             gamestate = 0
         # Next level button is not drawn if there are no proceeding levels
-        if currentLevel < maxLvls - 1 and nextLevel.isPressed(mouseDown):
+        if currentLevel < maxLvls - 1 and nextLevel.isPressed():
             currentLevel += 1
-            levels[currentLevel][1] = 1
-            currentLevelData = levels[currentLevel][0]
+            unlocked[currentLevel] = True
             gamestate = 0.5
     # Death screen -----------------------------------------------------------------------------------------------------
     if gamestate == -1:
         # Changes player image to ghost
         player.image = player.ghost
         # Displays restart and main menu buttons
-        if restart.isPressed(mouseDown):
+        if restart.isPressed():
             gamestate = 0.5
-        if mainMenu.isPressed(mouseDown):
+            restartLevel = True
+        if mainMenu.isPressed():
             gamestate = 0
 
-    # Updates player and draws world if the current game state is not a menu
+    # Updates player and draws score and health if the current game state is not a menu
     if gamestate == 1 or gamestate == -1 or gamestate == 2:
-        world.drawLvl()
+        world.drawScore()
         player.update()
+        player.drawHealth()
 
-    # Updates buttons and draws layers
+    # Updates buttons, the buttons drawn this tick are the ones on the screen
     buttons.update()
-    screen.blit(mobLayer, (0, 0))
-    screen.blit(menuLayer, (0, 0))
-
-    # Displays FPS counter if the option is toggled on
-    if fpsCounter:
-        displayFPS(screen, (0, 0), font, (255, 255, 255), FPS)
-    else:
-        pygame.display.update()
-        clock.tick(FPS)
+    shownWidgets, drawnWidgets = drawnWidgets, []
@@ -0,0 +1,214 @@
+# ======================================================================================================================
+#
+# Timing tools for the platformer game.
+#
+# StartupProfile times the steps the game goes through before its first frame is on screen. Each call to mark() ends
+# the step running since the last mark (or since the profile was created) and names it, report() lists every step with
+# its time and share of the time to the first frame. Steps that are deferred until after the first frame are timed
+# separately with time(), and listed after it.
+#
+# Run the game with --startup-profile to print the report once the first frame is drawn, and again once the deferred
+# steps have finished.
+#
+# FrameProfile times the phases of every frame the game draws: the event pump, moving the level's objects, collision
+# checks, the camera, the rest of the game logic, drawing the level, drawing the scene, compositing the layers and
+# updating the display. Each phase is started with phase(), which ends the one before it, and time outside of any phase
+# (waiting for the next frame) only counts towards the frame time. The last historyLength frames are kept for the
+# in-game overlay, toggled with F3, which shows rolling percentiles, the average time of each phase and a graph of frame
+# times. Run the game with --profile-csv [file] to also write every frame to a CSV file, frameprofile.csv by default.
+# Every frame's CPU time is recorded too, and the share of a core used is summed apart for frames at full rate and for
+# idle frames, drawn on a screen that was waiting for input.
+#
+# BenchmarkRun feeds scripted input to the game in benchmark mode and sums up the run, see benchmarks/suite.py.
+#
+# ======================================================================================================================
+
+import collections
+import csv
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Classes --------------------------------------------------------------------------------------------------------------
+
+# Startup profile, the clock starts when it is created
+class StartupProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        # (name, seconds) of each step before the first frame, and of each step deferred until after it
+        self.steps = []
+        self.deferred = []
+        self.firstFrame = None
+
+    # Ends the step running since the last mark
+    def mark(self, name):
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last))
+        self.last = now
+
+    # Ends the last step before the first frame, the time to first frame is counted up to here
+    def markFirstFrame(self, name='first frame'):
+        self.mark(name)
+        self.firstFrame = self.last - self.start
+
+    # Runs a deferred step and records how long it took
+    def time(self, name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.deferred.append((name, time.perf_counter() - start))
+        return result
+
+    # Report of the steps timed so far, in milliseconds
+    def report(self):
+        total = self.firstFrame if self.firstFrame is not None else self.last - self.start
+        lines = [f'Startup: {total * 1000:.1f} ms to first frame']
+        for name, seconds in self.steps:
+            lines.append(f'    {name:<24}{seconds * 1000:8.1f} ms {seconds / total if total else 0:6.1%}')
+        if self.deferred:
+            lines.append(f'Deferred until after the first frame: {sum(s for n, s in self.deferred) * 1000:.1f} ms')
+            for name, seconds in self.deferred:
+                lines.append(f'    {name:<24}{seconds * 1000:8.1f} ms')
+        return '\n'.join(lines)
+
+
+# Frame profile, also holds counts of the work done in each frame such as collision tests, blits and texts rendered, and
+# the CPU time each frame took. Frames drawn on an idle screen, waiting for input instead of running at full rate, are
+# counted apart so the share of a core the game uses while idle can be reported
+class FrameProfile:
+    phases = ['events', 'objects', 'collisions', 'camera', 'game', 'level drawing', 'scene', 'compositing', 'display']
+    historyLength = 300
+
+    def __init__(self):
+        # Seconds spent in each phase so far this frame
+        self.times = dict.fromkeys(self.phases, 0)
+        self.current = None
+        self.last = time.perf_counter()
+        self.frameStart = self.last
+        # (frame ms, ms spent in phases, ms of each phase, collision tests, blits, text renders, CPU ms, idle) of the
+        # latest frames
+        self.history = collections.deque(maxlen=self.historyLength)
+        # CPU time used by the process at the end of the last frame, and the CPU and wall clock seconds of every frame
+        # so far, of frames at full rate and idle frames
+        self.cpuLast = time.process_time()
+        self.cpuSeconds = [0, 0]
+        self.wallSeconds = [0, 0]
+        self.frames = 0
+        self.csvFile = None
+        self.csvWriter = None
+
+    # Starts timing a phase and ends the one running, None ends the running phase without starting another
+    def phase(self, name):
+        now = time.perf_counter()
+        if self.current is not None:
+            self.times[self.current] += now - self.last
+        self.current = name
+        self.last = now
+
+    # Ends the frame and records it, idle is True if the frame waited for input instead of running at full rate
+    def endFrame(self, collisionTests, blits, textRenders=0, idle=False):
+        self.phase(None)
+        cpu = time.process_time()
+        cpuMs = (cpu - self.cpuLast) * 1000
+        self.cpuLast = cpu
+        phaseTimes = tuple(self.times[name] * 1000 for name in self.phases)
+        frame = ((self.last - self.frameStart) * 1000, sum(phaseTimes), phaseTimes, collisionTests, blits, textRenders,
+                 cpuMs, idle)
+        self.history.append(frame)
+        self.cpuSeconds[idle] += cpuMs / 1000
+        self.wallSeconds[idle] += frame[0] / 1000
+        if self.csvWriter is not None:
+            self.csvWriter.writerow([self.frames, *(f'{ms:.3f}' for ms in (frame[0], frame[1], *phaseTimes)),
+                                     collisionTests, blits, textRenders, f'{cpuMs:.3f}', int(idle)])
+        self.times = dict.fromkeys(self.phases, 0)
+        self.frameStart = self.last
+        self.frames += 1
+
+    # Writes every frame from now on to a CSV file, one row per frame
+    def writeCsv(self, path):
+        self.csvFile = open(path, 'w', newline='', buffering=1)
+        self.csvWriter = csv.writer(self.csvFile)
+        self.csvWriter.writerow(['frame', 'frame ms', 'work ms', *(f'{name} ms' for name in self.phases),
+                                 'collision tests', 'blits', 'text renders', 'cpu ms', 'idle'])
+
+    def close(self):
+        if self.csvFile is not None:
+            self.csvFile.close()
+            self.csvFile = self.csvWriter = None
+
+    # Percent of a core used in every frame so far, only in idle frames if idle is True or only in frames at full rate
+    # if it is False. None if there have been no such frames
+    def cpuUsage(self, idle=None):
+        if idle is None:
+            cpu, wall = sum(self.cpuSeconds), sum(self.wallSeconds)
+        else:
+            cpu, wall = self.cpuSeconds[idle], self.wallSeconds[idle]
+        return cpu / wall * 100 if wall else None
+
+    # Lines of text summarising the latest frames, for the overlay
+    def summary(self):
+        if not self.history:
+            return []
+        frames = len(self.history)
+        lines = [f'{label:<14}' + '  '.join(f'p{percent} {percentile(values, percent):5.1f}'
+                                            for percent in (50, 95, 99))
+                 for label, values in (('Frame ms', [frame[0] for frame in self.history]),
+                                       ('Work ms', [frame[1] for frame in self.history]))]
+        for index, name in enumerate(self.phases):
+            lines.append(f'{name:<14}{sum(frame[2][index] for frame in self.history) / frames:6.2f} ms')
+        lines.append(f'Collision tests {sum(frame[3] for frame in self.history) / frames:.0f}  '
+                     f'Blits {sum(frame[4] for frame in self.history) / frames:.0f}  '
+                     f'Texts {sum(frame[5] for frame in self.history) / frames:.1f} per frame')
+        usage = [self.cpuUsage(idle) for idle in (False, True)]
+        lines.append('CPU ' + '  '.join(f'{label} {"n/a" if percent is None else f"{percent:.0f}%"}'
+                                        for label, percent in zip(('active', 'idle'), usage)))
+        return lines
+
+
+# Benchmark run, plays a list of input flags one tick at a time. The clock starts with the first tick
+class BenchmarkRun:
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.tick = 0
+        self.start = None
+        # Time the level took to build
+        self.buildSeconds = None
+
+    # Input flags for the next tick
+    def nextInputs(self):
+        if self.start is None:
+            self.start = time.perf_counter()
+        inputs = self.inputs[self.tick]
+        self.tick += 1
+        return inputs
+
+    def done(self):
+        return self.tick >= len(self.inputs)
+
+    # Ticks run, their speed and the build time, plus any other values given
+    def summary(self, **values):
+        seconds = time.perf_counter() - self.start if self.start is not None else 0
+        return {'ticks': self.tick, 'seconds': seconds, 'ticksPerSecond': self.tick / seconds if seconds else 0,
+                'buildMs': self.buildSeconds * 1000 if self.buildSeconds is not None else None, **values}
+
+
+# Functions ------------------------------------------------------------------------------------------------------------
+
+# Most memory the process has used so far in bytes, None where the platform can't tell
+def peakMemory():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Nearest rank percentile of a list of values
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(-(-len(ordered) * percent // 100) - 1, 0)]
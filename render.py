@@ -0,0 +1,317 @@
+# ======================================================================================================================
+#
+# Rendering helpers for the platformer game.
+#
+# TileLayer bakes a level's stationary tiles into fixed width chunk surfaces as the level's chunks are loaded, so
+# drawing them is a blit for each chunk in view instead of a blit for every tile in the level.
+#
+# RenderQueue collects everything drawn straight onto the screen in a frame, sorted into z-layers, and draws each
+# z-layer with a single blits call so every image is drawn exactly once per frame in the right order.
+#
+# FrameRenderer composites the transparent drawing layers onto the screen at the end of each frame. By default the
+# whole screen is redrawn every frame. In partial mode it only clears, redraws and updates the areas that changed since
+# the previous frame: everything blitted onto a Layer is recorded automatically, anything else that changes on the
+# screen has to be passed to mark(). Whenever the whole scene changes (the camera moves, the screen changes) the
+# renderer falls back to redrawing everything for that frame.
+#
+# TextCache keeps the most recently used rendered texts, so text drawn every frame is only rendered by the font once.
+# GlyphStrip renders a set of characters once each and draws text made of them, eg. numbers, by blitting the glyphs
+# side by side, so text that keeps changing never has to be rendered at all.
+#
+# ======================================================================================================================
+
+from collections import OrderedDict
+
+import pygame
+from assets import convertSurface, displayFormat
+
+
+# Static tile layer, split into chunks of chunkWidth pixels that are baked as they are added. Tiles are sprites in world
+# coordinates and must not cross a chunk boundary, which holds as long as chunkWidth is a multiple of the tile size
+class TileLayer:
+    def __init__(self, levelHeight, chunkWidth):
+        self.chunkWidth = chunkWidth
+        self.height = levelHeight
+        # Tiles and baked surface of each chunk added, chunks with no tiles have no surface
+        self.tiles = {}
+        self.chunks = {}
+
+    # Adds a chunk's tiles and bakes them
+    def addChunk(self, chunk, tiles):
+        self.tiles[chunk] = tiles
+        if tiles:
+            self.chunks[chunk] = self.bakeChunk(chunk, tiles)
+
+    def removeChunk(self, chunk):
+        self.tiles.pop(chunk, None)
+        self.chunks.pop(chunk, None)
+
+    # Draws a chunk's tiles onto a new surface
+    def bakeChunk(self, chunk, tiles):
+        surface = pygame.Surface((self.chunkWidth, self.height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        surface.blits([(tile.image, tile.rect.move(-chunk * self.chunkWidth, 0)) for tile in tiles], False)
+        if displayFormat() is not None:
+            surface = convertSurface(surface)
+        return surface
+
+    # Bakes every chunk again, eg. if the tile images change
+    def bake(self):
+        for chunk in self.chunks:
+            self.chunks[chunk] = self.bakeChunk(chunk, self.tiles[chunk])
+
+    # Indexes of the baked chunks overlapping the view
+    def visibleChunks(self, cameraX, viewWidth):
+        first = cameraX // self.chunkWidth
+        last = (cameraX + viewWidth - 1) // self.chunkWidth
+        return [chunk for chunk in range(first, last + 1) if chunk in self.chunks]
+
+    # Adds the chunks in a view viewWidth wide to a render queue, at the screen positions for cameraX
+    def queue(self, renderQueue, layer, cameraX, viewWidth):
+        for chunk in self.visibleChunks(cameraX, viewWidth):
+            renderQueue.add(layer, self.chunks[chunk], (chunk * self.chunkWidth - cameraX, 0))
+
+
+# Render queue z-layers, drawn from first to last
+BACKGROUND = 0
+TILES = 1
+OBJECTS = 2
+WINGS = 3
+PLAYER = 4
+zLayers = 5
+
+
+# Render queue, images added to a z-layer are drawn in the order they were added, over every lower z-layer
+class RenderQueue:
+    def __init__(self):
+        # (image, rect on the surface) of each z-layer
+        self.layers = [[] for layer in range(zLayers)]
+
+    def add(self, layer, image, position):
+        rect = image.get_rect(topleft=position)
+        self.layers[layer].append((image, rect))
+        return rect
+
+    def clear(self):
+        for items in self.layers:
+            items.clear()
+
+    # Draws the queue onto a surface, one blits call for each z-layer. If the surface is clipped, only images inside
+    # the clip area are drawn. Returns the number of images drawn
+    def draw(self, surface):
+        clip = surface.get_clip()
+        clipped = clip != surface.get_rect()
+        count = 0
+        for items in self.layers:
+            if clipped:
+                items = [item for item in items if clip.colliderect(item[1])]
+            surface.blits(items, False)
+            count += len(items)
+        return count
+
+
+# Merges overlapping rects so no area is redrawn twice, rects with no area are dropped
+def mergeRects(rects):
+    merged = []
+    for rect in rects:
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        rect = pygame.Rect(rect)
+        # Keeps absorbing overlapping rects until the merged rect doesn't touch any of the others
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+# Transparent drawing layer, remembers every area drawn on it since it was last cleared, and every area cleared since
+# the last frame was drawn. Anything outside of those areas is fully transparent
+class Layer(pygame.Surface):
+    def __init__(self, size):
+        super().__init__(size, pygame.SRCALPHA, 32)
+        self.drawn = []
+        self.cleared = []
+        # Blits onto the layer since the renderer last counted them
+        self.blitCount = 0
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        rect = super().blit(source, dest, area, special_flags)
+        self.drawn.append(rect)
+        self.blitCount += 1
+        return rect
+
+    def blits(self, blit_sequence, doreturn=1):
+        rects = super().blits(blit_sequence, 1)
+        self.drawn.extend(rects)
+        self.blitCount += len(rects)
+        return rects if doreturn else None
+
+    # Records an area drawn with something other than blit, eg. pygame.draw functions, and returns it
+    def mark(self, rect):
+        self.drawn.append(rect)
+        return rect
+
+    # Clears the layer, if partial is True only the areas drawn on it are cleared
+    def clear(self, partial):
+        if partial:
+            for rect in self.drawn:
+                self.fill((0, 0, 0, 0), rect)
+        else:
+            self.fill((0, 0, 0, 0))
+        self.cleared += self.drawn
+        self.drawn = []
+
+
+# Frame renderer, composites layers onto the screen and updates the display
+class FrameRenderer:
+    def __init__(self, screen, layers):
+        self.screen = screen
+        self.layers = layers
+        self.partial = False
+        # Screen areas outside the layers that changed this frame and last frame
+        self.marked = []
+        self.previousMarked = []
+        self.redrawNeeded = True
+        self.sceneKey = None
+        # Number of display rects and pixels sent in the last frame
+        self.updatedRects = 0
+        self.updatedArea = 0
+        # Blits made for the last frame: onto the layers, compositing them, and any counted with countBlits()
+        self.blitCount = 0
+        self.sceneBlits = 0
+        # Frame profile the drawing phases are timed with, if any
+        self.profile = None
+
+    # Switches partial mode on or off, the next frame is always redrawn in full
+    def setPartial(self, partial):
+        if partial != self.partial:
+            self.partial = partial
+            self.redrawAll()
+
+    # Makes the next frame redraw the whole screen, eg. after the window is resized
+    def redrawAll(self):
+        self.redrawNeeded = True
+
+    # Records an area of the screen that changes this frame without going through a layer
+    def mark(self, rect):
+        self.marked.append(rect)
+
+    # Counts blits made straight onto the screen, eg. by drawScene
+    def countBlits(self, count):
+        self.sceneBlits += count
+
+    def setPhase(self, name):
+        if self.profile is not None:
+            self.profile.phase(name)
+
+    # Clears layers, layers that aren't redrawn every frame can be cleared separately whenever they are redrawn
+    def clearLayers(self, *layers):
+        for layer in layers:
+            layer.clear(self.partial)
+
+    # Starts a new frame, clearing the layers that are redrawn every frame
+    def beginFrame(self, *layers):
+        self.clearLayers(*layers)
+        self.previousMarked = self.marked
+        self.marked = []
+
+    # Draws the frame and updates the display. drawScene draws everything that goes directly onto the screen under the
+    # layers, and is called with the screen's clip set to the area being redrawn. sceneKey is any value that changes
+    # whenever the whole screen changes, such as the game state and camera position
+    def endFrame(self, drawScene, sceneKey):
+        screenRect = self.screen.get_rect()
+        rects = None
+        if self.partial and not self.redrawNeeded and sceneKey == self.sceneKey:
+            rects = self.previousMarked + self.marked
+            for layer in self.layers:
+                rects += layer.cleared + layer.drawn
+            rects = mergeRects(screenRect.clip(rect) for rect in rects)
+            # Past half of the screen, a single full redraw is cheaper than many small ones
+            if sum(rect.width * rect.height for rect in rects) > screenRect.width * screenRect.height // 2:
+                rects = None
+        self.sceneKey = sceneKey
+        self.redrawNeeded = False
+        self.sceneBlits = 0
+        blits = 0
+        for layer in self.layers:
+            layer.cleared = []
+            blits += layer.blitCount
+            layer.blitCount = 0
+        if rects is None:
+            self.setPhase('scene')
+            drawScene()
+            self.setPhase('compositing')
+            # Layers are transparent outside of the areas drawn on them, so only those areas need compositing
+            for layer in self.layers:
+                for rect in mergeRects(screenRect.clip(rect) for rect in layer.drawn):
+                    self.screen.blit(layer, rect, rect)
+                    blits += 1
+            self.setPhase('display')
+            pygame.display.update()
+            self.updatedRects = 1
+            self.updatedArea = screenRect.width * screenRect.height
+        else:
+            for rect in rects:
+                self.setPhase('scene')
+                self.screen.set_clip(rect)
+                drawScene()
+                self.setPhase('compositing')
+                for layer in self.layers:
+                    self.screen.blit(layer, rect, rect)
+                blits += len(self.layers)
+            self.screen.set_clip(None)
+            self.setPhase('display')
+            pygame.display.update(rects)
+            self.updatedRects = len(rects)
+            self.updatedArea = sum(rect.width * rect.height for rect in rects)
+        self.blitCount = blits + self.sceneBlits
+
+
+# Text cache, holds at most capacity rendered texts and drops the least recently used one to make room for another
+class TextCache:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        # Rendered texts by (font, text, colour, antialias), from least to most recently used
+        self.surfaces = OrderedDict()
+        # Texts rendered by the font since the renders were last counted
+        self.renders = 0
+
+    # Returns a text rendered in a font, only rendering it if it isn't in the cache
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, antialias, color)
+            self.renders += 1
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    # Returns the number of texts rendered since it was last called
+    def countRenders(self):
+        renders, self.renders = self.renders, 0
+        return renders
+
+
+# Glyph strip, every character rendered once in a font and colour. Text made only of those characters is drawn by
+# blitting each character's glyph after the one before it
+class GlyphStrip:
+    def __init__(self, font, characters, color, antialias=True):
+        self.glyphs = {character: font.render(character, antialias, color) for character in characters}
+        self.height = font.get_height()
+
+    # Draws text onto a surface with its top left at position, returns the area drawn
+    def draw(self, surface, text, position):
+        x, y = position
+        sequence = []
+        for character in text:
+            glyph = self.glyphs[character]
+            sequence.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(sequence, False)
+        return pygame.Rect(position[0], y, x - position[0], self.height)
@@ -0,0 +1,113 @@
+# ======================================================================================================================
+#
+# Input recordings of level attempts, replayed tick for tick to reproduce a run exactly, eg. a slow frame or a collision
+# bug.
+#
+# A recording holds the input flags of every tick of one attempt at a level, from the tick it starts to the tick it
+# ended or was saved on, along with everything else that decides how the attempt plays out: the level, the cheats,
+# wings and fly settings, and the seed the random generator was given when the attempt started (it picks the music
+# track). The state the attempt ended in is kept too, so a replay can check it ended up in the same place.
+#
+# Recording files are a small header followed by the ticks' input flags, one byte per tick, compressed with zlib:
+#     4 bytes   magic, b'PRPL'
+#     2 bytes   format version
+#     2 bytes   level number, the game's level count for the custom level
+#     4 bytes   CRC-32 of the level's tiles, as they are stored in a binary level file
+#     4 bytes   random seed
+#     1 byte    settings, CHEATS, WINGS and FLY flags
+#     4 bytes   ticks recorded
+#     4 + 4 + 4 + 2 + 2 + 1 bytes   x, y, yVel, health, score and status the attempt ended in
+#     the rest  compressed input flags
+# Numbers are little endian.
+#
+# The input flags are engine's, plus PAUSED on the ticks the game was paused for.
+#
+# Show what a recording holds with:
+#     python -m replayfile <recording file>
+#
+# ======================================================================================================================
+
+import struct
+import sys
+import zlib
+
+import levelfile
+
+magic = b'PRPL'
+version = 1
+header = struct.Struct('<4sHHIIBIiiihHb')
+extension = '.prp'
+# Input flag for ticks the game was paused on, above every engine input flag
+PAUSED = 128
+# Settings flags
+CHEATS = 1
+WINGS = 2
+FLY = 4
+
+
+# Classes --------------------------------------------------------------------------------------------------------------
+
+# Recording of an attempt at a level, ticks are added with record() as they are played
+class Recording:
+    def __init__(self, level, checksum, seed, cheats=False, wings=True, fly=False):
+        self.level = level
+        self.checksum = checksum
+        self.seed = seed
+        self.cheats = cheats
+        self.wings = wings
+        self.fly = fly
+        self.inputs = bytearray()
+        # (x, y, yVel, health, score, status) the attempt ended in, set before saving
+        self.result = None
+
+    def __len__(self):
+        return len(self.inputs)
+
+    # Adds a tick's input flags
+    def record(self, inputs, paused=False):
+        self.inputs.append(inputs | PAUSED if paused else inputs)
+
+    def save(self, path):
+        settings = CHEATS * self.cheats | WINGS * self.wings | FLY * self.fly
+        with open(path, 'wb') as recordingFile:
+            recordingFile.write(header.pack(magic, version, self.level, self.checksum, self.seed, settings,
+                                            len(self.inputs), *(self.result or (0, 0, 0, 0, 0, 0))))
+            recordingFile.write(zlib.compress(bytes(self.inputs), 9))
+
+
+# Functions ------------------------------------------------------------------------------------------------------------
+
+# CRC-32 of a level's tiles, the same for a level whatever format it was loaded from
+def levelChecksum(data):
+    if isinstance(data, levelfile.LevelData):
+        return zlib.crc32(data.tiles)
+    return zlib.crc32(levelfile.packLevel(data)[levelfile.header.size:])
+
+
+def loadRecording(path):
+    with open(path, 'rb') as recordingFile:
+        contents = recordingFile.read()
+    if len(contents) < header.size:
+        raise ValueError(f'{path} is not a recording')
+    fileMagic, fileVersion, level, checksum, seed, settings, ticks, *result = header.unpack_from(contents)
+    if fileMagic != magic or fileVersion != version:
+        raise ValueError(f'{path} is not a version {version} recording')
+    recording = Recording(level, checksum, seed, bool(settings & CHEATS), bool(settings & WINGS), bool(settings & FLY))
+    recording.inputs = bytearray(zlib.decompress(contents[header.size:]))
+    if len(recording.inputs) != ticks:
+        raise ValueError(f'{path} should hold {ticks} ticks, it holds {len(recording.inputs)}')
+    recording.result = tuple(result)
+    return recording
+
+
+def main():
+    path = sys.argv[1]
+    recording = loadRecording(path)
+    print(f'{path}: level {recording.level + 1}, {len(recording)} ticks, seed {recording.seed}, '
+          f'cheats {"on" if recording.cheats else "off"}, wings {"on" if recording.wings else "off"}, '
+          f'fly {"on" if recording.fly else "off"}')
+    print('Ended at x {}, y {}, yVel {}, health {}, score {}, status {}'.format(*recording.result))
+
+
+if __name__ == '__main__':
+    main()
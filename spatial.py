@@ -0,0 +1,105 @@
+# ======================================================================================================================
+#
+# Spatial indexes used for collision checks, so a check only looks at objects near the player instead of every object
+# in the level.
+#
+# TileGrid holds sprites that sit exactly on the level grid (stationary blocks) and looks them up by tile. SpatialHash
+# is a uniform grid of buckets for everything else. Objects that move have to be moved in the hash whenever their rect
+# changes, or be added under the whole area they move in. TileGrid returns sprites row by row, SpatialHash in the order
+# they were added unless they are given an order to be returned in, which is the same order the old sprite group loops
+# went through them in, so collision results don't change. Both only store the tiles and cells that have something in
+# them, so their size depends on how many sprites they hold rather than how big the level is.
+#
+# ======================================================================================================================
+
+
+# Tile grid, stores at most one sprite per tile
+class TileGrid:
+    def __init__(self, columns, rows, tileSize):
+        self.columns = columns
+        self.rows = rows
+        self.tileSize = tileSize
+        # Sprites by (column, row)
+        self.cells = {}
+
+    def add(self, sprite, column, row):
+        self.cells[(column, row)] = sprite
+
+    def remove(self, column, row):
+        self.cells.pop((column, row), None)
+
+    # Returns the sprites in every tile the rect touches, row by row from the top left
+    def query(self, rect):
+        firstColumn = max(rect.left // self.tileSize, 0)
+        lastColumn = min((rect.right - 1) // self.tileSize, self.columns - 1)
+        firstRow = max(rect.top // self.tileSize, 0)
+        lastRow = min((rect.bottom - 1) // self.tileSize, self.rows - 1)
+        found = []
+        get = self.cells.get
+        for row in range(firstRow, lastRow + 1):
+            for column in range(firstColumn, lastColumn + 1):
+                sprite = get((column, row))
+                if sprite is not None:
+                    found.append(sprite)
+        return found
+
+
+# Spatial hash, buckets sprites by the cells their rects overlap
+class SpatialHash:
+    def __init__(self, cellSize):
+        self.cellSize = cellSize
+        self.buckets = {}
+        # Range of cells each sprite is currently in, and the order sprites were added in
+        self.boundsOf = {}
+        self.order = {}
+        self.added = 0
+
+    # Range of cells covered by a rect, as (first column, last column, first row, last row)
+    def bounds(self, rect):
+        size = self.cellSize
+        return rect.left // size, (rect.right - 1) // size, rect.top // size, (rect.bottom - 1) // size
+
+    # Cells in a range of cells
+    def cellsIn(self, bounds):
+        left, right, top, bottom = bounds
+        return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
+
+    # Cells covered by a rect
+    def cells(self, rect):
+        return self.cellsIn(self.bounds(rect))
+
+    # Adds a sprite, order is where it comes in query results, by default after every sprite added before it. The sprite
+    # is indexed under its rect, or under area if given: a sprite that moves within a known area can be indexed under
+    # all of it and never has to be moved, queries then return it whenever it could be in the rect queried
+    def add(self, sprite, order=None, area=None):
+        self.order[sprite] = self.added if order is None else order
+        self.added += 1
+        bounds = self.bounds(sprite.rect if area is None else area)
+        self.boundsOf[sprite] = bounds
+        for cell in self.cellsIn(bounds):
+            self.buckets.setdefault(cell, []).append(sprite)
+
+    def remove(self, sprite):
+        for cell in self.cellsIn(self.boundsOf.pop(sprite)):
+            self.buckets[cell].remove(sprite)
+        del self.order[sprite]
+
+    # Moves a sprite to the cells its rect is in now, only touches the buckets if the cells have changed
+    def move(self, sprite):
+        bounds = self.bounds(sprite.rect)
+        oldBounds = self.boundsOf[sprite]
+        if bounds != oldBounds:
+            for cell in self.cellsIn(oldBounds):
+                self.buckets[cell].remove(sprite)
+            for cell in self.cellsIn(bounds):
+                self.buckets.setdefault(cell, []).append(sprite)
+            self.boundsOf[sprite] = bounds
+
+    # Returns the sprites in every cell the rect touches, in the order they were added
+    def query(self, rect):
+        found = set()
+        for cell in self.cells(rect):
+            bucket = self.buckets.get(cell)
+            if bucket:
+                found.update(bucket)
+        return sorted(found, key=self.order.__getitem__)